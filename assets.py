@@ -0,0 +1,98 @@
+import os
+import pygame
+from collections import OrderedDict
+
+class TextureCache:
+    """Кэш текстур процесса: каждый файл загружается, конвертируется и масштабируется один раз"""
+    def __init__(self):
+        # (путь, размер, прозрачность) -> (время изменения файла, поверхность)
+        self._textures = {}
+        # (путь, размер, углы) -> (время изменения файла, {ключ: повёрнутая поверхность})
+        self._rotations = {}
+    
+    def load(self, path, size, alpha=True):
+        """Возвращает текстуру нужного размера; файл перечитывается, только если он изменился"""
+        mtime = os.path.getmtime(path)
+        key = (path, size, alpha)
+        cached = self._textures.get(key)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        
+        image = pygame.image.load(path)
+        image = image.convert_alpha() if alpha else image.convert()
+        texture = pygame.transform.scale(image, size)
+        self._textures[key] = (mtime, texture)
+        return texture
+    
+    def load_rotated(self, path, size, angles):
+        """Возвращает словарь повёрнутых вариантов текстуры; angles - {ключ: угол}"""
+        mtime = os.path.getmtime(path)
+        key = (path, size, tuple(sorted(angles.items())))
+        cached = self._rotations.get(key)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        
+        texture = self.load(path, size)
+        rotations = {name: pygame.transform.rotate(texture, angle) for name, angle in angles.items()}
+        self._rotations[key] = (mtime, rotations)
+        return rotations
+    
+    def clear(self):
+        """Очищает кэш"""
+        self._textures.clear()
+        self._rotations.clear()
+
+class TextCache:
+    """Реестр шрифтов и LRU-кэш отрисованных строк с ограничением по памяти"""
+    def __init__(self, max_bytes=8 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        # (имя, размер) -> шрифт; SysFont ищет системный шрифт только при первом запросе
+        self._fonts = {}
+        # (имя, размер, текст, цвет) -> поверхность, от давно использованных к недавним
+        self._surfaces = OrderedDict()
+    
+    def font(self, name, size):
+        """Возвращает шрифт из реестра, создавая его при первом обращении"""
+        key = (name, size)
+        font = self._fonts.get(key)
+        if font is None:
+            font = pygame.font.SysFont(name, size)
+            self._fonts[key] = font
+        return font
+    
+    def render(self, name, size, text, color):
+        """Возвращает отрисованную строку; повторная отрисовка того же текста берётся из кэша"""
+        key = (name, size, text, tuple(color))
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self._surfaces.move_to_end(key)
+            return surface
+        
+        self.misses += 1
+        surface = self.font(name, size).render(text, True, color)
+        self._surfaces[key] = surface
+        self.bytes += self._size_of(surface)
+        # Вытеснение давно не использованных строк, пока кэш не уложится в лимит
+        while self.bytes > self.max_bytes and len(self._surfaces) > 1:
+            _, old = self._surfaces.popitem(last=False)
+            self.bytes -= self._size_of(old)
+        return surface
+    
+    def clear(self):
+        """Очищает кэш строк и счётчики; шрифты остаются в реестре"""
+        self._surfaces.clear()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def _size_of(surface):
+        return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+# Общие для всего процесса кэши текстур и текста
+textures = TextureCache()
+texts = TextCache()
\ No newline at end of file
@@ -0,0 +1,402 @@
+import argparse
+import heapq
+import time
+from array import array
+from settings import Settings
+
+class Autopilot:
+    """Автопилот змейки: кратчайший путь к еде, если после него змейка не запрёт себя.
+    
+    Если у поля есть гамильтонов цикл, путь принимается, только когда тело после
+    него лежит вдоль цикла от хвоста к голове: тогда клетки цикла перед головой
+    свободны, и без безопасного пути змейка идёт по циклу, срезая его к еде. Это
+    не даёт ей погибнуть и на заполненном поле. Без цикла путь проверяется тем,
+    что после него голова может добраться до хвоста, а иначе змейка тянет время.
+    
+    Путь к цели ищется A* с манхэттенским расстоянием: на открытом поле он
+    проходит клетки вдоль пути, а не весь круг радиусом до цели. Построенный
+    путь используется, пока еда не сдвинулась. Если пути нет или он небезопасен,
+    новый поиск к той же еде откладывается, пока змейка не пройдёт свою длину
+    (до тех пор тело почти то же, и поиск дал бы тот же ответ), а после каждой
+    следующей неудачи - вдвое дольше; тем временем змейка идёт по циклу или
+    тянет время. Массивы поиска не очищаются между тиками - устаревшие
+    метки отличаются номером поиска. Соседи клетки вычисляются по её индексу.
+    Если еды на поле несколько, целью выбирается ближайшая к голове. Клетки
+    стен (walls) исключаются из соседей, и цикл на поле со стенами не строится.
+    """
+    def __init__(self, cols, rows, walls=()):
+        self.cols = cols
+        self.rows = rows
+        self.size = cols * rows
+        self.walls = frozenset(walls)
+        # Номер каждой клетки в гамильтоновом цикле или None, если цикл не построить
+        # (у поля с нечётным числом и строк, и столбцов или со стенами)
+        self.cycle = self._build_cycle() if not self.walls else None
+        
+        # Клетка посещена текущим поиском, если _visited[cell] == _search;
+        # занята телом, если _blocked[cell] == _block
+        self._visited = array('I', bytes(4 * self.size))
+        self._blocked = array('I', bytes(4 * self.size))
+        self._parent = array('i', bytes(4 * self.size))
+        self._queue = array('i', bytes(4 * self.size))
+        # Длина найденного пути до клетки в текущем поиске A*
+        self._cost = array('I', bytes(4 * self.size))
+        self._search = 0
+        self._block = 0
+        # Запланированный путь к еде: следующая клетка - последняя в списке
+        self._path = []
+        self._path_food = None
+        # Еда, путь к которой не найден или отвергнут, число неудачных поисков к ней
+        # и ход змейки, до которого поиск не повторяется
+        self._fallback_food = None
+        self._fallback_failures = 0
+        self._fallback_until = 0
+        
+        # Статистика решений
+        self.decisions = 0
+        self.searches = 0
+        self.path_reuses = 0
+        self.fallback_reuses = 0
+        self.cycle_moves = 0
+        self.decision_time_total = 0.0
+        self.decision_time_max = 0.0
+    
+    @property
+    def mean_decision_time(self):
+        """Среднее время решения, с"""
+        if not self.decisions:
+            return 0.0
+        return self.decision_time_total / self.decisions
+    
+    def reset(self):
+        """Забывает план перед новой партией; статистика сохраняется"""
+        self._path = []
+        self._path_food = None
+        self._fallback_food = None
+        self._fallback_failures = 0
+        self._fallback_until = 0
+    
+    def control(self, state):
+        """Выбирает направление и передаёт его змейке, как нажатие клавиши"""
+        direction = self.decide(state)
+        if direction is not None:
+            state.snake.change_direction(direction)
+        return direction
+    
+    def decide(self, state):
+        """Возвращает направление на следующий тик ("UP", "DOWN", "LEFT", "RIGHT") или None"""
+        started = time.perf_counter()
+        direction = self._decide(state)
+        elapsed = time.perf_counter() - started
+        self.decisions += 1
+        self.decision_time_total += elapsed
+        self.decision_time_max = max(self.decision_time_max, elapsed)
+        return direction
+    
+    def _decide(self, state):
+        snake = state.snake
+        grid = state.grid
+        if grid.cols != self.cols or grid.rows != self.rows:
+            raise ValueError("Размер поля не совпадает с размером автопилота")
+        head = snake.head_cell
+        tail = snake.tail_cell
+        food = self._nearest_food(head, grid)
+        
+        # Следование плану: еда на месте, следующая клетка пути свободна
+        if self._path and self._path_food == food and self._distance(head, self._path[-1]) == 1:
+            target = self._path[-1]
+            if not grid.is_occupied(target) or target == tail:
+                self._path.pop()
+                self.path_reuses += 1
+                return self._direction(head, target)
+        self._path = []
+        
+        body = None
+        if food is not None and (food != self._fallback_food or snake.moves >= self._fallback_until):
+            self.searches += 1
+            body = snake.cells().tolist()[::-1]
+            path = self._path_to(head, food, body, snake)
+            if path is not None and self._safe_after(path, body):
+                self._path = path
+                self._path_food = food
+                return self._direction(head, self._path.pop())
+            if food != self._fallback_food:
+                self._fallback_food = food
+                self._fallback_failures = 0
+            self._fallback_until = snake.moves + max(snake.length, 1 << self._fallback_failures)
+            self._fallback_failures += 1
+        elif food is not None:
+            self.fallback_reuses += 1
+        if self.cycle is not None:
+            target = self._cycle_step(head, tail, food, grid, snake)
+            if target is not None:
+                self.cycle_moves += 1
+                return self._direction(head, target)
+        if body is None:
+            body = snake.cells().tolist()[::-1]
+        return self._stall(head, body, food, snake)
+    
+    def _nearest_food(self, head, grid):
+        """Клетка ближайшей к голове еды или None, если еды нет"""
+        if len(grid.foods) == 1:
+            return next(iter(grid.foods))
+        return min(grid.foods, key=lambda cell: self._distance(head, cell), default=None)
+    
+    def _keeps_order(self, cells):
+        """Проверяет, что клетки идут по циклу в прямом порядке, не делая полного оборота"""
+        cycle = self.cycle
+        start = cycle[cells[0]]
+        previous = -1
+        for cell in cells:
+            offset = (cycle[cell] - start) % self.size
+            if offset <= previous:
+                return False
+            previous = offset
+        return True
+    
+    def _cycle_step(self, head, tail, food, grid, snake):
+        """Ход по циклу; путь к еде можно срезать, не обгоняя хвост - тело остаётся вдоль цикла"""
+        cycle = self.cycle
+        size = self.size
+        position = cycle[head]
+        to_tail = (cycle[tail] - position) % size or size
+        to_food = (cycle[food] - position) % size if food is not None else size
+        best = None
+        best_offset = 0
+        behind = self._behind(head, snake.last_direction)
+        for nxt in self._around(head):
+            if nxt == behind:
+                continue
+            offset = (cycle[nxt] - position) % size
+            if offset > best_offset and (offset == 1 or (offset < to_tail and offset <= to_food)):
+                # Проверка занятости нужна, если автопилот включили посреди партии
+                if not grid.is_occupied(nxt) or nxt == tail:
+                    best, best_offset = nxt, offset
+        return best
+    
+    def _block_cells(self, cells):
+        """Отмечает клетки занятыми для следующих поисков"""
+        self._block += 1
+        block = self._block
+        blocked = self._blocked
+        for cell in cells:
+            blocked[cell] = block
+    
+    def _block_body(self, body, snake):
+        """Блокирует тело без хвоста, который уйдёт за ход, и клетку позади головы:
+        поворот назад змейка не выполнит, даже если там хвост"""
+        self._block_cells(body[:-1] if len(body) > 1 else body)
+        behind = self._behind(body[0], snake.last_direction)
+        if behind is not None:
+            self._blocked[behind] = self._block
+    
+    def _around(self, cell):
+        """Соседние клетки без стен"""
+        cols = self.cols
+        col = cell % cols
+        around = []
+        if cell >= cols:
+            around.append(cell - cols)
+        if cell + cols < self.size:
+            around.append(cell + cols)
+        if col > 0:
+            around.append(cell - 1)
+        if col < cols - 1:
+            around.append(cell + 1)
+        if self.walls:
+            return [nxt for nxt in around if nxt not in self.walls]
+        return around
+    
+    def _bfs(self, start):
+        """Поиск в ширину по незаблокированным клеткам; возвращает число посещённых клеток"""
+        self._search += 1
+        search = self._search
+        block = self._block
+        visited = self._visited
+        blocked = self._blocked
+        queue = self._queue
+        around = self._around
+        visited[start] = search
+        queue[0] = start
+        read, write = 0, 1
+        while read < write:
+            cell = queue[read]
+            read += 1
+            for nxt in around(cell):
+                if visited[nxt] == search or blocked[nxt] == block:
+                    continue
+                visited[nxt] = search
+                queue[write] = nxt
+                write += 1
+        return write
+    
+    def _reach(self, start, goal):
+        """Кратчайший путь A* по незаблокированным клеткам; goal можно занять, даже если он
+        заблокирован. Возвращает, найдена ли цель; путь восстанавливается по _parent"""
+        self._search += 1
+        search = self._search
+        block = self._block
+        visited = self._visited
+        blocked = self._blocked
+        parent = self._parent
+        cost = self._cost
+        around = self._around
+        cols = self.cols
+        goal_col, goal_row = goal % cols, goal // cols
+        visited[start] = search
+        cost[start] = 0
+        # (длина пути + расстояние до цели, -длина пути, клетка): при равной оценке
+        # раньше раскрывается клетка дальше от старта, и поиск идёт прямо к цели
+        heap = [(abs(start % cols - goal_col) + abs(start // cols - goal_row), 0, start)]
+        while heap:
+            _, length, cell = heapq.heappop(heap)
+            length = -length
+            if length > cost[cell]:
+                continue
+            length += 1
+            for nxt in around(cell):
+                if nxt == goal:
+                    parent[nxt] = cell
+                    return True
+                if blocked[nxt] == block or (visited[nxt] == search and cost[nxt] <= length):
+                    continue
+                visited[nxt] = search
+                cost[nxt] = length
+                parent[nxt] = cell
+                estimate = length + abs(nxt % cols - goal_col) + abs(nxt // cols - goal_row)
+                heapq.heappush(heap, (estimate, -length, nxt))
+        return False
+    
+    def _path_to(self, head, goal, body, snake):
+        """Кратчайший путь от головы к goal: клетки от goal к первому шагу или None"""
+        self._block_body(body, snake)
+        if not self._reach(head, goal):
+            return None
+        path = []
+        cell = goal
+        while cell != head:
+            path.append(cell)
+            cell = self._parent[cell]
+        return path
+    
+    def _safe_after(self, path, body):
+        """Проверяет, что после прохода по пути к еде змейка не запрёт себя"""
+        if self.cycle is not None:
+            # Тело на каждом шаге пути - отрезок этой последовательности от хвоста к голове
+            return self._keeps_order(body[::-1] + path[::-1])
+        length = len(body) + 1
+        if length >= self.size:
+            return True
+        # Тело после поедания: путь от еды назад, затем начало прежнего тела
+        new_body = path[:length]
+        if len(new_body) < length:
+            new_body = new_body + body[:length - len(new_body)]
+        self._block_cells(new_body[:-1])
+        return self._reach(new_body[0], new_body[-1])
+    
+    def _stall(self, head, body, food, snake):
+        """Ход без еды: в клетку, откуда виден хвост, подальше от еды; иначе - в самую большую область"""
+        best = None
+        best_key = None
+        for nxt in self._around(head):
+            self._block_body(body, snake)
+            if self._blocked[nxt] == self._block:
+                continue
+            # Тело после хода без еды: хвост уходит с места
+            moved = [nxt] + body[:-1]
+            self._block_cells(moved[:-1])
+            reaches_tail = len(moved) == 1 or self._reach(nxt, moved[-1])
+            region = 0
+            if not reaches_tail:
+                region = self._bfs(nxt)
+            distance = self._distance(nxt, food) if food is not None else 0
+            key = (reaches_tail, region, distance)
+            if best_key is None or key > best_key:
+                best, best_key = nxt, key
+        if best is None:
+            return None
+        return self._direction(head, best)
+    
+    def _distance(self, a, b):
+        return abs(a % self.cols - b % self.cols) + abs(a // self.cols - b // self.cols)
+    
+    def _direction(self, cell, target):
+        """Направление от клетки к соседней"""
+        if target == cell - self.cols:
+            return "UP"
+        if target == cell + self.cols:
+            return "DOWN"
+        if target == cell - 1:
+            return "LEFT"
+        return "RIGHT"
+    
+    def _behind(self, cell, direction):
+        """Клетка позади головы, движущейся в direction, или None за краем поля"""
+        row, col = divmod(cell, self.cols)
+        row -= {"UP": -1, "DOWN": 1}.get(direction, 0)
+        col -= {"LEFT": -1, "RIGHT": 1}.get(direction, 0)
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            return row * self.cols + col
+        return None
+    
+    def _build_cycle(self):
+        """Строит гамильтонов цикл змейкой по строкам (или столбцам) с возвратом по краю"""
+        cols, rows = self.cols, self.rows
+        if rows % 2 == 0 and cols >= 2:
+            order = self._cycle_order(cols, rows, lambda col, row: row * cols + col)
+        elif cols % 2 == 0 and rows >= 2:
+            order = self._cycle_order(rows, cols, lambda row, col: row * cols + col)
+        else:
+            return None
+        cycle = array('I', bytes(4 * self.size))
+        for i, cell in enumerate(order):
+            cycle[cell] = i
+        return cycle
+    
+    @staticmethod
+    def _cycle_order(width, height, cell):
+        """Обход сетки width x height с чётной высотой: строки туда-обратно без первого
+        столбца, затем вверх по первому столбцу"""
+        order = [cell(x, 0) for x in range(width)]
+        for y in range(1, height):
+            xs = range(width - 1, 0, -1) if y % 2 else range(1, width)
+            order.extend(cell(x, y) for x in xs)
+        order.extend(cell(0, y) for y in range(height - 1, 0, -1))
+        return order
+
+def check_levels(games, levels, max_ticks=100000):
+    """Играет автопилотом по games партий на каждом уровне; возвращает {уровень: (побед, тиков, автопилот)}"""
+    from engine import Engine, WIN, LOSE
+    
+    results = {}
+    for level in levels:
+        engine = Engine(level)
+        grid = engine.state.grid
+        autopilot = Autopilot(grid.cols, grid.rows, grid.walls)
+        wins = ticks = 0
+        for seed in range(games):
+            state = engine.reset(level, seed)
+            autopilot.reset()
+            event = None
+            while event not in (WIN, LOSE) and state.tick < max_ticks:
+                autopilot.control(state)
+                state, event = engine.step()
+            wins += event == WIN
+            ticks += state.tick
+        results[level] = (wins, ticks, autopilot)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Проверка целей уровней автопилотом")
+    parser.add_argument("--games", type=int, default=20, help="партий на уровень")
+    parser.add_argument("--levels", type=int, nargs="+", default=list(Settings.LEVELS), help="уровни")
+    args = parser.parse_args()
+    
+    failed = False
+    for level, (wins, ticks, autopilot) in check_levels(args.games, args.levels).items():
+        failed |= wins < args.games
+        print(f"Уровень {level}: побед {wins}/{args.games}, тиков в среднем {ticks / args.games:.0f}, "
+              f"решение {autopilot.mean_decision_time * 1e6:.0f} мкс в среднем, "
+              f"{autopilot.decision_time_max * 1e6:.0f} мкс максимум, "
+              f"поисков {autopilot.searches} на {autopilot.decisions} решений")
+    raise SystemExit(1 if failed else 0)
\ No newline at end of file
@@ -0,0 +1,188 @@
+import numpy as np
+from settings import Settings
+from levels import wall_cells
+
+# Коды направлений и событий в массивах BatchEngine
+DIRECTIONS = ("UP", "DOWN", "LEFT", "RIGHT")
+UP, DOWN, LEFT, RIGHT = range(4)
+NO_ACTION = -1
+MOVE, EAT, WIN, LOSE = range(4)
+
+_DX = np.array([0, 0, -1, 1], dtype=np.int32)
+_DY = np.array([-1, 1, 0, 0], dtype=np.int32)
+_OPPOSITE = np.array([DOWN, UP, RIGHT, LEFT], dtype=np.int8)
+
+class BatchEngine:
+    """N независимых партий в массивах NumPy, которые продвигаются на тик одним вызовом step().
+    
+    Правила еды те же, что в Engine: съеденная еда встаёт в другую свободную
+    клетку без еды, временная еда через food_ttl тиков после появления
+    переносится на новое место. Еда лежит в массиве foods по партиям, клетка
+    -1 - еды нет: ей не нашлось места.
+    """
+    # Попыток случайного выбора клетки для еды до перебора свободных клеток
+    FOOD_ATTEMPTS = 8
+    
+    def __init__(self, n, level=1, seed=None, dis_width=Settings.DIS_WIDTH,
+                 dis_height=Settings.DIS_HEIGHT, block_size=Settings.BLOCK_SIZE):
+        self.n = n
+        self.level = level
+        config = Settings.LEVELS[level]
+        self.goal = config["goal"]
+        self.cols = dis_width // block_size
+        self.rows = dis_height // block_size
+        # Клетки стен: занятыми они отмечаются при каждом начале партии
+        self.walls = np.array(wall_cells(config.get("border", False), config["walls"], self.cols, self.rows),
+                              dtype=np.int64)
+        self.size = self.cols * self.rows
+        # Стартовая клетка та же, что в Snake.reset
+        self.start_col = round(dis_width / 2 / block_size)
+        self.start_row = round(dis_height / 2 / block_size)
+        self.rng = np.random.default_rng(seed)
+        
+        self.head_x = np.zeros(n, dtype=np.int32)
+        self.head_y = np.zeros(n, dtype=np.int32)
+        # Кольцевые буферы тела: клетка головы лежит в body[i, head_ptr[i]],
+        # хвост - на length - 1 позиций раньше
+        self.body = np.zeros((n, self.size), dtype=np.int32)
+        self.head_ptr = np.zeros(n, dtype=np.int32)
+        self.length = np.zeros(n, dtype=np.int32)
+        self.occupied = np.zeros((n, self.size), dtype=np.uint8)
+        # Обычная еда, за ней временная: по столбцу на каждую
+        self.timed_from = config.get("foods", 1)
+        self.food_ttl = config.get("food_ttl", 0)
+        self.foods = np.full((n, self.timed_from + config.get("timed_foods", 0)), -1, dtype=np.int32)
+        # Тик переноса каждой еды, -1 - еда не переносится
+        self.expires = np.full(self.foods.shape, -1, dtype=np.int64)
+        self.direction = np.zeros(n, dtype=np.int8)
+        self.last_direction = np.zeros(n, dtype=np.int8)
+        # Тики и счёт партий, завершившихся на последнем шаге
+        self.ticks = np.zeros(n, dtype=np.int64)
+        self.final_score = np.zeros(n, dtype=np.int32)
+        
+        self._boards = np.arange(n, dtype=np.int64)
+        self._base = self._boards * self.size
+        self._body_flat = self.body.reshape(-1)
+        self._occupied_flat = self.occupied.reshape(-1)
+        self.reset()
+    
+    @property
+    def score(self):
+        return self.length - 1
+    
+    def reset(self, mask=None):
+        """Начинает заново партии, отмеченные в mask (по умолчанию - все)"""
+        boards = self._boards if mask is None else np.flatnonzero(mask)
+        if boards.size == 0:
+            return
+        start = self.start_row * self.cols + self.start_col
+        self.occupied[boards] = 0
+        if self.walls.size:
+            self.occupied[np.ix_(boards, self.walls)] = 1
+        self._occupied_flat[boards * self.size + start] = 1
+        self.head_x[boards] = self.start_col
+        self.head_y[boards] = self.start_row
+        self.head_ptr[boards] = 0
+        self.body[boards, 0] = start
+        self.length[boards] = 1
+        self.direction[boards] = RIGHT
+        self.last_direction[boards] = RIGHT
+        self.ticks[boards] = 0
+        self.foods[boards] = -1
+        self.expires[boards] = -1
+        for slot in range(self.foods.shape[1]):
+            self._place_food(boards, slot)
+    
+    def step(self, actions=None):
+        """Выполняет тик во всех партиях; actions - коды направлений или NO_ACTION.
+        
+        Возвращает массив событий (MOVE, EAT, WIN, LOSE). Завершённые партии
+        сразу начинаются заново, их итоговый счёт остаётся в final_score.
+        """
+        # Начало строки каждой партии в плоских body и occupied (длина строки - size)
+        base = self._base
+        size = self.size
+        
+        if actions is not None:
+            actions = np.asarray(actions, dtype=np.int8)
+            turn = (actions >= 0) & (actions != _OPPOSITE[self.last_direction])
+            np.copyto(self.direction, actions, where=turn)
+        
+        x = self.head_x + _DX[self.direction]
+        y = self.head_y + _DY[self.direction]
+        self.last_direction[:] = self.direction
+        outside = (x < 0) | (x >= self.cols) | (y < 0) | (y >= self.rows)
+        cell = np.where(outside, 0, y * self.cols + x)
+        hits = self.foods == cell[:, None]
+        ate = hits.any(axis=1) & ~outside
+        
+        # Хвост освобождает клетку до того, как в неё может войти голова
+        tail = (self.head_ptr - self.length + 1) % size
+        moving = ~ate
+        tail_cell = self._body_flat[base + tail]
+        self._occupied_flat[(base + tail_cell)[moving]] = 0
+        
+        lose = outside | (self._occupied_flat[base + cell] != 0)
+        self.head_ptr = (self.head_ptr + 1) % size
+        self._body_flat[base + self.head_ptr] = cell
+        self._occupied_flat[base + cell] = 1
+        self.length += ate
+        self.head_x = x
+        self.head_y = y
+        self.ticks += 1
+        
+        events = np.where(ate, EAT, MOVE).astype(np.int8)
+        eaters = np.flatnonzero(ate & ~lose)
+        if eaters.size:
+            slots = hits[eaters].argmax(axis=1)
+            self.foods[eaters, slots] = -1
+            self._place_food(eaters, slots)
+            # Заполненное поле считается победой, как и в Engine
+            won = eaters[(self.length[eaters] - 1 >= self.goal) |
+                         (self.length[eaters] + self.walls.size >= size)]
+            events[won] = WIN
+        events[lose] = LOSE
+        
+        done = events >= WIN
+        if self.foods.shape[1] > self.timed_from:
+            self._move_expired(~done)
+        if done.any():
+            self.final_score[done] = self.length[done] - 1
+            self.reset(done)
+        return events
+    
+    def _move_expired(self, active):
+        """Переносит временную еду, срок которой истёк, в партиях из маски active"""
+        for slot in range(self.timed_from, self.foods.shape[1]):
+            expires = self.expires[:, slot]
+            boards = np.flatnonzero(active & (expires >= 0) & (expires <= self.ticks))
+            if boards.size:
+                self.foods[boards, slot] = -1
+                self._place_food(boards, slot)
+    
+    def _place_food(self, boards, slots):
+        """Ставит еду slots в случайные свободные клетки без еды указанных партий.
+        
+        Партии в boards не повторяются, место еды slots перед вызовом - -1.
+        Временная еда получает срок переноса; еда, которой не нашлось места,
+        остаётся с клеткой -1 и не переносится.
+        """
+        slots = np.broadcast_to(slots, boards.shape)
+        pending = np.arange(boards.size)
+        for _ in range(self.FOOD_ATTEMPTS):
+            cells = self.rng.integers(0, self.size, pending.size)
+            rows = boards[pending]
+            free = ((self._occupied_flat[rows * self.size + cells] == 0) &
+                    ~(self.foods[rows] == cells[:, None]).any(axis=1))
+            self.foods[rows[free], slots[pending[free]]] = cells[free]
+            pending = pending[~free]
+            if pending.size == 0:
+                break
+        # Почти заполненные поля: равномерный выбор из списка свободных клеток без еды
+        for i in pending:
+            free_cells = np.flatnonzero(self.occupied[boards[i]] == 0)
+            free_cells = free_cells[~np.isin(free_cells, self.foods[boards[i]])]
+            if free_cells.size:
+                self.foods[boards[i], slots[i]] = free_cells[self.rng.integers(free_cells.size)]
+        timed = (slots >= self.timed_from) & (self.foods[boards, slots] >= 0)
+        self.expires[boards, slots] = np.where(timed, self.ticks[boards] + self.food_ttl, -1)
\ No newline at end of file
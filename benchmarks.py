@@ -0,0 +1,422 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+from settings import Settings
+from engine import Engine
+from grid import Grid
+from food import Food
+
+def _best_time(func, repeat=5):
+    """Лучшее время из нескольких запусков func(), с"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def _result(name, params, value, unit, better):
+    return {"name": name, "params": params, "value": value, "unit": unit, "better": better}
+
+def _serpentine(cols, length, block_size):
+    """Тело заданной длины: голова в левом верхнем углу, ниже - ряды змейкой; первая строка свободна"""
+    body = [(0, 0)]
+    row = 1
+    while len(body) < length:
+        columns = range(cols) if row % 2 else range(cols - 1, -1, -1)
+        for col in columns:
+            if len(body) == length:
+                break
+            body.append((col * block_size, row * block_size))
+        row += 1
+    return body
+
+def bench_ticks(lengths=(10, 100, 1000, 10000, 100000), ticks=1000):
+    """Тиков в секунду в зависимости от длины змейки; змейка идёт по свободной первой строке"""
+    block_size = Settings.BLOCK_SIZE
+    cols = ticks + 2
+    results = []
+    for length in lengths:
+        rows = length // cols + 3
+        engine = Engine(1, seed=1, dis_width=cols * block_size, dis_height=rows * block_size,
+                        block_size=block_size)
+        body = _serpentine(cols, length, block_size)
+        
+        def run():
+            step = engine.step
+            for _ in range(ticks):
+                step()
+        
+        best = None
+        for _ in range(5):
+            state = engine.reset(seed=1)
+            # Без цели уровня партия не закончится победой посреди замера
+            engine.goal = float("inf")
+            state.snake.restore(body, "RIGHT")
+            state.food.randomize_position()
+            elapsed = _best_time(run, repeat=1)
+            if state.over:
+                raise RuntimeError(f"Партия закончилась до конца замера (длина {length})")
+            best = elapsed if best is None else min(best, elapsed)
+        results.append(_result("tick", {"length": length}, ticks / best, "ticks/s", "higher"))
+    return results
+
+def bench_levels(ticks=10000):
+    """Тиков в секунду на каждом уровне: стены, несколько еды и еда со временем жизни
+    не должны замедлять тик. Змейка кружит по квадрату 2x2 у стартовой клетки"""
+    turns = ("DOWN", "LEFT", "UP", "RIGHT")
+    results = []
+    for level in Settings.LEVELS:
+        engine = Engine(level, seed=1)
+        
+        def run():
+            engine.reset(seed=1)
+            engine.goal = float("inf")
+            step = engine.step
+            for i in range(ticks):
+                step(turns[i % 4])
+        
+        elapsed = _best_time(run)
+        if engine.state.over:
+            raise RuntimeError(f"Партия закончилась до конца замера (уровень {level})")
+        results.append(_result("level", {"level": level}, ticks / elapsed, "ticks/s", "higher"))
+    return results
+
+def bench_food(fills=(0.0, 0.5, 0.9, 0.99), calls=10000):
+    """Стоимость Food.randomize_position в зависимости от заполненности поля"""
+    cols = Settings.DIS_WIDTH // Settings.BLOCK_SIZE
+    rows = Settings.DIS_HEIGHT // Settings.BLOCK_SIZE
+    results = []
+    for fill in fills:
+        grid = Grid(cols, rows, Settings.BLOCK_SIZE)
+        rng = random.Random(1)
+        for cell in rng.sample(range(grid.size), int(grid.size * fill)):
+            grid.occupy(cell)
+        food = Food(Settings.DIS_WIDTH, Settings.DIS_HEIGHT, Settings.BLOCK_SIZE, grid=grid, rng=rng)
+        
+        def run():
+            place = food.randomize_position
+            for _ in range(calls):
+                place()
+        
+        elapsed = _best_time(run)
+        results.append(_result("food", {"fill": fill}, elapsed / calls * 1e6, "us/call", "lower"))
+    return results
+
+def _init_display():
+    import pygame
+    pygame.display.init()
+    pygame.font.init()
+    return pygame.display.set_mode((Settings.DIS_WIDTH, Settings.DIS_HEIGHT))
+
+def _textures():
+    """Текстуры игры из кэша или None, если файлов нет"""
+    from assets import textures
+    from snake import Snake
+    size = (Settings.BLOCK_SIZE, Settings.BLOCK_SIZE)
+    try:
+        return (textures.load('assets/snake_head.png', size),
+                textures.load_rotated('assets/snake_head.png', size, Snake.HEAD_ANGLES),
+                textures.load('assets/snake_body.png', size),
+                textures.load('assets/food.png', size))
+    except Exception as e:
+        print(f"Текстуры не загружены: {e}", file=sys.stderr)
+        return None
+
+def bench_render(lengths=(10, 100, 1000), frames=200):
+    """Время кадра: Snake.draw на всём поле и отрисовка игрового поля, как в Game._render_game"""
+    import pygame
+    from assets import texts
+    from renderer import DirtyRenderer
+    
+    screen = _init_display()
+    background = pygame.Surface(screen.get_size())
+    background.fill(Settings.BLUE)
+    loaded = _textures()
+    cols = Settings.DIS_WIDTH // Settings.BLOCK_SIZE
+    results = []
+    for textured in (False, True):
+        if textured and loaded is None:
+            continue
+        for length in lengths:
+            engine = Engine(1, seed=1)
+            engine.goal = float("inf")
+            state = engine.state
+            # Без первой строки под строку счёта и с запасом свободных клеток для хода
+            body = _serpentine(cols, min(length, cols * (Settings.DIS_HEIGHT // Settings.BLOCK_SIZE - 3)),
+                               Settings.BLOCK_SIZE)
+            state.snake.restore(body, "RIGHT")
+            state.food.randomize_position()
+            if textured:
+                head, rotations, body_texture, food_texture = loaded
+                state.snake.head_texture = head
+                state.snake.head_rotations = rotations
+                state.snake.body_texture = body_texture
+                state.food.food_texture = food_texture
+            params = {"length": len(body), "textures": textured}
+            
+            def draw():
+                for _ in range(frames):
+                    screen.blit(background, (0, 0))
+                    state.snake.draw(screen, Settings.GREEN)
+            
+            elapsed = _best_time(draw, repeat=3)
+            results.append(_result("snake_draw", params, elapsed / frames * 1e3, "ms/frame", "lower"))
+            
+            for dirty_rects in (False, True):
+                renderer = DirtyRenderer(screen, background, Settings.GREEN, Settings.RED, dirty_rects=dirty_rects)
+                
+                def render():
+                    # Тик на каждый кадр; дойдя до края свободной строки, змейка
+                    # возвращается на старт, и кадр перерисовывается целиком
+                    state.snake.restore(body, "RIGHT")
+                    renderer.invalidate()
+                    for i in range(frames):
+                        if state.snake.body[0][0] >= (cols - 2) * Settings.BLOCK_SIZE:
+                            state.snake.restore(body, "RIGHT")
+                            renderer.invalidate()
+                        engine.step()
+                        renderer.track(state.diff)
+                        hud = texts.render(Settings.SCORE_FONT, 35, f"Счёт: {state.score}", Settings.WHITE)
+                        renderer.render(state.snake, state.food, hud)
+                
+                elapsed = _best_time(render, repeat=3)
+                results.append(_result("render_game", dict(params, dirty_rects=dirty_rects),
+                                       elapsed / frames * 1e3, "ms/frame", "lower"))
+    return results
+
+def bench_camera(worlds=(100, 1000, 5000), lengths=(10, 10000, 100000), frames=100):
+    """Время кадра большого поля через камеру в зависимости от размера поля и длины змейки"""
+    import pygame
+    from assets import texts
+    from renderer import CameraRenderer
+    
+    screen = _init_display()
+    background = pygame.Surface(screen.get_size())
+    background.fill(Settings.BLUE)
+    block_size = Settings.BLOCK_SIZE
+    hud = texts.render(Settings.SCORE_FONT, 35, "Счёт: 0", Settings.WHITE)
+    results = []
+    for cols in worlds:
+        for length in lengths:
+            if length > cols * (cols - 3):
+                continue
+            engine = Engine(1, seed=1, dis_width=cols * block_size, dis_height=cols * block_size,
+                            block_size=block_size)
+            state = engine.state
+            # Тело лежит рядами от головы в углу поля: в окно попадает его часть, не больше окна
+            state.snake.restore(_serpentine(cols, length, block_size), "RIGHT")
+            renderer = CameraRenderer(screen, background, Settings.GREEN, Settings.RED)
+            
+            def render():
+                for i in range(frames):
+                    renderer.render(state.snake, state.food, hud, i / frames)
+            
+            elapsed = _best_time(render, repeat=3)
+            results.append(_result("camera", {"world": cols, "length": length},
+                                   elapsed / frames * 1e3, "ms/frame", "lower"))
+    return results
+
+def bench_observation(worlds=(40, 1000), lengths=(10, 1000), calls=2000):
+    """Стоимость Observation.update() за тик: по изменениям тика и полной перестройкой кадра.
+    
+    Замеряется только update(): ходы движка и возврат к началу в сумму не входят.
+    """
+    from observation import Observation
+    
+    block_size = Settings.BLOCK_SIZE
+    results = []
+    for cols in worlds:
+        for length in lengths:
+            if length > cols * (cols - 3):
+                continue
+            engines = []
+            for _ in range(2):
+                engine = Engine(1, seed=1, dis_width=cols * block_size, dis_height=cols * block_size,
+                                block_size=block_size)
+                engine.state.snake.restore(_serpentine(cols, length, block_size), "RIGHT")
+                engines.append(engine)
+            engine = engines[0]
+            # Два одинаковых состояния: при смене состояния update() строит кадр заново
+            states = [engine.state for engine in engines]
+            start = engine.snapshot()
+            observation = Observation(engine, directions=True)
+            
+            def incremental():
+                # Змейка идёт по свободной первой строке и у её конца возвращается к началу
+                elapsed = 0.0
+                for i in range(calls):
+                    if i % (cols - 1) == 0:
+                        engine.restore(start)
+                        observation.update()
+                    engine.step()
+                    started = time.perf_counter()
+                    observation.update()
+                    elapsed += time.perf_counter() - started
+                return elapsed
+            
+            def rebuild():
+                elapsed = 0.0
+                for i in range(calls):
+                    engine.state = states[i % 2]
+                    started = time.perf_counter()
+                    observation.update()
+                    elapsed += time.perf_counter() - started
+                engine.state = states[0]
+                return elapsed
+            
+            params = {"world": cols, "length": length}
+            for mode, run in (("incremental", incremental), ("rebuild", rebuild)):
+                elapsed = min(run() for _ in range(3))
+                results.append(_result("observation", dict(params, mode=mode),
+                                       elapsed / calls * 1e6, "us/update", "lower"))
+    return results
+
+def bench_state(lengths=(100, 10000, 100000), calls=200):
+    """Память на сегмент змейки (кольцо клеток против списка кортежей в пикселях)
+    и время Engine.save/Engine.load"""
+    import tracemalloc
+    
+    block_size = Settings.BLOCK_SIZE
+    results = []
+    for length in lengths:
+        cols = 1000
+        engine = Engine(1, seed=1, dis_width=cols * block_size, dis_height=(length // cols + 3) * block_size,
+                        block_size=block_size)
+        body = _serpentine(cols, length, block_size)
+        params = {"length": length}
+        
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        engine.state.snake.restore(body, "RIGHT")
+        ring = tracemalloc.get_traced_memory()[0] - before
+        cells = engine.state.snake.cells()
+        pos_of = engine.state.grid.pos_of
+        before = tracemalloc.get_traced_memory()[0]
+        # Прежнее представление: список кортежей (x, y), координаты которых
+        # вычисляются заново, как при движении
+        segments = [pos_of(cell) for cell in cells]
+        tuples = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        del segments
+        results.append(_result("segment_memory", dict(params, body="array"), ring / length, "bytes", "lower"))
+        results.append(_result("segment_memory", dict(params, body="list"), tuples / length, "bytes", "lower"))
+        
+        data = engine.save()
+        results.append(_result("save_size", params, len(data), "bytes", "lower"))
+        
+        def save():
+            for _ in range(calls):
+                engine.save()
+        
+        def load():
+            for _ in range(calls):
+                Engine.load(data)
+        
+        results.append(_result("save", params, _best_time(save) / calls * 1e6, "us/call", "lower"))
+        results.append(_result("load", params, _best_time(load) / calls * 1e6, "us/call", "lower"))
+    return results
+
+def bench_text(calls=2000):
+    """Стоимость отрисовки строки счёта: без кэша, промах и попадание в кэш текста"""
+    from assets import TextCache
+    
+    _init_display()
+    cache = TextCache()
+    font = cache.font(Settings.SCORE_FONT, 35)
+    text = "Счёт: 10 | Рекорд: 20 | Уровень: Лёгкий"
+    
+    def uncached():
+        for i in range(calls):
+            font.render(text, True, Settings.WHITE)
+    
+    def misses():
+        cache.clear()
+        for i in range(calls):
+            cache.render(Settings.SCORE_FONT, 35, f"Счёт: {i} | Рекорд: 20", Settings.WHITE)
+    
+    def hits():
+        for i in range(calls):
+            cache.render(Settings.SCORE_FONT, 35, text, Settings.WHITE)
+    
+    return [
+        _result("hud_text", {"mode": mode}, _best_time(func) / calls * 1e6, "us/call", "lower")
+        for mode, func in (("font_render", uncached), ("cache_miss", misses), ("cache_hit", hits))
+    ]
+
+BENCHMARKS = {
+    "tick": bench_ticks,
+    "level": bench_levels,
+    "food": bench_food,
+    "render": bench_render,
+    "camera": bench_camera,
+    "observation": bench_observation,
+    "state": bench_state,
+    "text": bench_text,
+}
+
+def compare(results, baseline, threshold):
+    """Сравнивает результаты с прошлым запуском; возвращает строки отчёта и число ухудшений"""
+    previous = {(entry["name"], json.dumps(entry["params"], sort_keys=True)): entry
+                for entry in baseline["results"]}
+    lines = []
+    regressions = 0
+    for entry in results:
+        old = previous.get((entry["name"], json.dumps(entry["params"], sort_keys=True)))
+        if old is None or not old["value"]:
+            continue
+        change = entry["value"] / old["value"] - 1
+        worse = -change if entry["better"] == "higher" else change
+        mark = ""
+        if worse > threshold:
+            regressions += 1
+            mark = "  УХУДШЕНИЕ"
+        lines.append(f"{entry['name']:<12} {json.dumps(entry['params'], ensure_ascii=False):<48} {change:+7.1%}{mark}")
+    return lines, regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Замеры производительности игры")
+    parser.add_argument("benchmarks", nargs="*",
+                        help=f"какие замеры запускать: {', '.join(BENCHMARKS)} (по умолчанию все)")
+    parser.add_argument("-o", "--output", help="сохранить результаты в JSON")
+    parser.add_argument("--compare", metavar="FILE", help="сравнить с результатами прошлого запуска")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="доля ухудшения, при которой замер считается регрессией")
+    args = parser.parse_args()
+    unknown = set(args.benchmarks) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"неизвестные замеры: {', '.join(sorted(unknown))}")
+    
+    import pygame
+    results = []
+    for name in args.benchmarks or BENCHMARKS:
+        for entry in BENCHMARKS[name]():
+            results.append(entry)
+            print(f"{entry['name']:<12} {json.dumps(entry['params'], ensure_ascii=False):<48} "
+                  f"{entry['value']:>14,.2f} {entry['unit']}")
+    report = {
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "machine": platform.machine(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    
+    if args.compare:
+        with open(args.compare) as f:
+            lines, regressions = compare(results, json.load(f), args.threshold)
+        print("\nИзменения относительно " + args.compare + ":")
+        print("\n".join(lines))
+        raise SystemExit(1 if regressions else 0)
\ No newline at end of file
@@ -0,0 +1,326 @@
+import heapq
+import random
+import struct
+import sys
+from array import array
+from time import perf_counter
+from settings import Settings
+from grid import Grid
+from snake import Snake
+from food import Food
+from levels import wall_cells
+
+# События, которые возвращает Engine.step
+MOVE = "move"
+EAT = "eat"
+WIN = "win"
+LOSE = "lose"
+
+DIRECTIONS = ("UP", "DOWN", "LEFT", "RIGHT")
+
+# Сохранение партии (Engine.save): заголовок _SAVE_HEADER, клетки тела от хвоста
+# к голове по 4 байта; у поля с индексом свободных клеток - занятость клеток,
+# порядок свободных клеток и их позиции, чтобы партия продолжилась ровно с того
+# же места, а не только с начала интервала снимков; затем состояние генератора: версия,
+# 625 слов по 4 байта, флаг и значение gauss_next; в конце дополнительная еда:
+# число и _SAVE_FOOD на каждую. Числа little-endian
+SAVE_MAGIC = b"SNKS"
+SAVE_VERSION = 1
+# MAGIC, версия, уровень, зерно, ширина, высота, размер клетки, интервал снимков, тик, цель,
+# партия окончена, направление, последнее направление, длина, клетка еды + 1 (0 - нет еды),
+# есть индекс, свободных клеток
+_SAVE_HEADER = struct.Struct("<4sBIQIIIIQdBBBIIBI")
+_RNG_TAIL = struct.Struct("<?d")
+# Клетка еды + 1 (0 - нет еды), тик исчезновения (-1 - еда постоянная)
+_SAVE_FOOD = struct.Struct("<Iq")
+
+def _little_endian(values):
+    """Байты array('I') в порядке little-endian"""
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+def _read_array(data, pos, count):
+    """Читает count чисел array('I'), записанных _little_endian; возвращает (массив, новая позиция)"""
+    end = pos + 4 * count
+    if end > len(data):
+        raise ValueError("Сохранение оборвано")
+    values = array('I')
+    values.frombytes(data[pos:end])
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values, end
+
+class TickDiff:
+    """Изменения поля за последний тик в пикселях; None - клетка не менялась"""
+    def __init__(self):
+        self.head = None  # Новая клетка головы
+        self.prev_head = None  # Прежняя голова, ставшая сегментом тела
+        self.tail = None  # Клетка, освобождённая хвостом
+        self.food_from = None  # Прежняя позиция съеденной еды
+        self.food_to = None  # Новая позиция еды
+        self.foods = []  # Переставленная по времени еда: [(откуда, куда)]
+    
+    def clear(self):
+        self.head = self.prev_head = self.tail = self.food_from = self.food_to = None
+        self.foods.clear()
+
+class GameState:
+    """Состояние одной партии: змейка, еда, уровень и номер тика"""
+    def __init__(self, snake, food, grid, level):
+        self.snake = snake
+        self.food = food
+        # Вся еда на поле; первая - food
+        self.foods = [food]
+        self.grid = grid
+        self.level = level
+        self.tick = 0
+        self.over = False
+        # Изменения за последний тик; объект переиспользуется между тиками
+        self.diff = TickDiff()
+    
+    @property
+    def score(self):
+        return len(self.snake.body) - 1
+
+class Engine:
+    """Игровая логика без pygame: один вызов step() - один тик игры"""
+    def __init__(self, level=1, seed=None, dis_width=Settings.DIS_WIDTH,
+                 dis_height=Settings.DIS_HEIGHT, block_size=Settings.BLOCK_SIZE,
+                 keyframe_interval=Settings.REPLAY_KEYFRAME_INTERVAL):
+        self.dis_width = dis_width
+        self.dis_height = dis_height
+        self.block_size = block_size
+        # Через сколько тиков индекс свободных клеток строится заново по занятости:
+        # на этих тиках снимок состояния продолжает партию так же, как исходную
+        self.keyframe_interval = keyframe_interval
+        # Получатель записи повтора: объект с методами turn(tick, direction) и keyframe(engine);
+        # keyframe вызывается каждые keyframe_interval тиков
+        self.recorder = None
+        # Профилировщик этапов тика: объект с методом record(этап, секунды) или None
+        self.profiler = None
+        self.reset(level, seed)
+    
+    def reset(self, level=None, seed=None):
+        """Начинает новую партию; без seed выбирается случайное зерно"""
+        if level is not None:
+            self.level = level
+        # Зерно всегда известно, чтобы партию можно было воспроизвести
+        self.seed = seed if seed is not None else random.randrange(1 << 32)
+        self.rng = random.Random(self.seed)
+        level = Settings.LEVELS[self.level]
+        self.goal = level["goal"]
+        self.food_ttl = level.get("food_ttl")
+        
+        grid = Grid(self.dis_width // self.block_size, self.dis_height // self.block_size, self.block_size)
+        grid.set_walls(wall_cells(level.get("border", False), level["walls"], grid.cols, grid.rows))
+        snake = Snake(self.dis_width, self.dis_height, self.block_size, grid=grid)
+        food = Food(self.dis_width, self.dis_height, self.block_size, grid=grid, rng=self.rng)
+        self.state = GameState(snake, food, grid, self.level)
+        for _ in range(level.get("foods", 1) - 1):
+            self.state.foods.append(Food(self.dis_width, self.dis_height, self.block_size, grid=grid, rng=self.rng))
+        # Очередь исчезновения еды: куча (тик, номер в state.foods); записи
+        # с устаревшим тиком пропускаются при извлечении
+        self._expiry = []
+        for _ in range(level.get("timed_foods", 0)):
+            timed = Food(self.dis_width, self.dis_height, self.block_size, grid=grid, rng=self.rng)
+            self.state.foods.append(timed)
+            self._schedule(timed, len(self.state.foods) - 1)
+        return self.state
+    
+    def _schedule(self, food, index):
+        """Назначает исчезновение еды с временем жизни через food_ttl тиков"""
+        if food.position is None:
+            food.expires_at = None
+            return
+        food.expires_at = self.state.tick + self.food_ttl
+        heapq.heappush(self._expiry, (food.expires_at, index))
+    
+    def snapshot(self):
+        """Возвращает состояние партии на начало текущего тика.
+        
+        Порядок свободных клеток в снимок не входит: restore строит его
+        по занятости, как step каждые keyframe_interval тиков. Партия,
+        восстановленная из снимка такого тика, идёт так же, как исходная.
+        """
+        state = self.state
+        # Дополнительная еда: [(позиция, тик исчезновения)]
+        foods = [(food.position, food.expires_at) for food in state.foods[1:]]
+        return (state.tick, state.snake.direction, list(state.snake.body), state.food.position,
+                self.rng.getstate(), foods)
+    
+    def restore(self, snapshot):
+        """Восстанавливает партию из snapshot() того же уровня и размера поля"""
+        tick, direction, body, food, rng_state, foods = snapshot
+        state = self.reset(self.level, self.seed)
+        state.snake.restore(body, direction)
+        state.grid.rebuild_index()
+        state.food.place(food)
+        self._restore_foods(foods)
+        self.rng.setstate(rng_state)
+        state.tick = tick
+        return state
+    
+    def _restore_foods(self, foods):
+        """Ставит дополнительную еду по [(позиция, тик исчезновения)] и заново строит очередь исчезновения"""
+        state = self.state
+        self._expiry = []
+        for index, (position, expires_at) in enumerate(foods, 1):
+            food = state.foods[index]
+            food.place(position)
+            food.expires_at = expires_at
+            if expires_at is not None:
+                self._expiry.append((expires_at, index))
+        heapq.heapify(self._expiry)
+    
+    def save(self):
+        """Сохраняет партию в байты для Engine.load; повороты в очереди ввода не сохраняются"""
+        state = self.state
+        snake = state.snake
+        grid = state.grid
+        food = state.food.position
+        indexed = grid.free is not None
+        out = bytearray(_SAVE_HEADER.pack(
+            SAVE_MAGIC, SAVE_VERSION, self.level, self.seed, self.dis_width, self.dis_height, self.block_size,
+            self.keyframe_interval, state.tick, self.goal, state.over, DIRECTIONS.index(snake.direction),
+            DIRECTIONS.index(snake.last_direction), snake.length, 0 if food is None else grid.cell_of(food) + 1,
+            indexed, grid.free_count
+        ))
+        out += _little_endian(snake.cells())
+        if indexed:
+            # Сетка копируется как есть: восстановление не перебирает клетки
+            out += grid.counts
+            out += _little_endian(grid.free)
+            out += _little_endian(grid.slot)
+        version, words, gauss_next = self.rng.getstate()
+        out.append(version)
+        out += _little_endian(array('I', words))
+        out += _RNG_TAIL.pack(gauss_next is not None, gauss_next or 0.0)
+        out += struct.pack("<I", len(state.foods) - 1)
+        for food in state.foods[1:]:
+            cell = 0 if food.position is None else grid.cell_of(food.position) + 1
+            out += _SAVE_FOOD.pack(cell, -1 if food.expires_at is None else food.expires_at)
+        return bytes(out)
+    
+    @classmethod
+    def load(cls, data):
+        """Восстанавливает партию из Engine.save()"""
+        if len(data) < _SAVE_HEADER.size or data[:len(SAVE_MAGIC)] != SAVE_MAGIC:
+            raise ValueError("Это не сохранение партии")
+        (_, version, level, seed, dis_width, dis_height, block_size, keyframe_interval, tick, goal, over,
+         direction, last_direction, length, food, indexed, free_count) = _SAVE_HEADER.unpack_from(data)
+        if version != SAVE_VERSION:
+            raise ValueError(f"Неизвестная версия сохранения: {version}")
+        engine = cls(level, seed, dis_width, dis_height, block_size, keyframe_interval)
+        state = engine.state
+        grid = state.grid
+        cells, pos = _read_array(data, _SAVE_HEADER.size, length)
+        if indexed:
+            grid.counts[:] = data[pos:pos + grid.size]
+            grid.free, pos = _read_array(data, pos + grid.size, grid.size)
+            grid.slot, pos = _read_array(data, pos, grid.size)
+            grid.free_count = free_count
+            state.snake.restore_cells(cells, DIRECTIONS[direction], occupy=False)
+        else:
+            # Большое поле, занятое меньше чем наполовину: индекса нет и у новой сетки
+            state.snake.restore_cells(cells, DIRECTIONS[direction])
+        state.snake.last_direction = DIRECTIONS[last_direction]
+        state.food.place(grid.pos_of(food - 1) if food else None)
+        
+        if pos + 1 + 4 * 625 + _RNG_TAIL.size > len(data):
+            raise ValueError("Сохранение оборвано")
+        rng_version = data[pos]
+        words, pos = _read_array(data, pos + 1, 625)
+        has_gauss, gauss_next = _RNG_TAIL.unpack_from(data, pos)
+        engine.rng.setstate((rng_version, tuple(words), gauss_next if has_gauss else None))
+        pos += _RNG_TAIL.size
+        if pos + 4 > len(data):
+            raise ValueError("Сохранение оборвано")
+        (count,) = struct.unpack_from("<I", data, pos)
+        pos += 4
+        if count != len(state.foods) - 1 or pos + count * _SAVE_FOOD.size > len(data):
+            raise ValueError("Сохранение не подходит к уровню")
+        foods = []
+        for cell, expires_at in _SAVE_FOOD.iter_unpack(data[pos:pos + count * _SAVE_FOOD.size]):
+            foods.append((grid.pos_of(cell - 1) if cell else None, None if expires_at < 0 else expires_at))
+        engine._restore_foods(foods)
+        engine.goal = goal
+        state.tick = tick
+        state.over = bool(over)
+        return engine
+    
+    def step(self, action=None):
+        """Выполняет один тик: action - новое направление ("UP", "DOWN", "LEFT", "RIGHT") или None"""
+        state = self.state
+        if state.over:
+            return state, None
+        
+        recorder = self.recorder
+        if state.tick and state.tick % self.keyframe_interval == 0:
+            # Порядок свободных клеток становится тем, что построит restore из снимка этого тика
+            state.grid.rebuild_index()
+            if recorder is not None:
+                recorder.keyframe(self)
+        
+        snake = state.snake
+        if action is not None:
+            snake.change_direction(action)
+        diff = state.diff
+        diff.clear()
+        diff.prev_head = snake.head
+        direction = snake.direction
+        profiler = self.profiler
+        if profiler is not None:
+            started = perf_counter()
+        ate = snake.move(state.food.position)
+        if profiler is not None:
+            profiler.record("move", perf_counter() - started)
+        # Записывается только применённый поворот: его достаточно, чтобы повторить партию
+        if snake.direction != direction and recorder is not None:
+            recorder.turn(state.tick, snake.direction)
+        diff.head = snake.head
+        diff.tail = snake.removed_tail
+        state.tick += 1
+        
+        if profiler is not None:
+            started = perf_counter()
+        collided = snake.check_collision()
+        if profiler is not None:
+            profiler.record("collision", perf_counter() - started)
+        if collided:
+            state.over = True
+            return state, LOSE
+        
+        grid = state.grid
+        event = MOVE
+        if ate:
+            # Съеденная еда - та, что лежит в клетке головы
+            eaten = grid.foods.get(snake.head_cell, state.food)
+            diff.food_from = eaten.position
+            if profiler is not None:
+                started = perf_counter()
+            eaten.randomize_position()
+            if profiler is not None:
+                profiler.record("food", perf_counter() - started)
+            diff.food_to = eaten.position
+            if eaten.expires_at is not None:
+                self._schedule(eaten, state.foods.index(eaten))
+            # Заполненное поле считается победой: еду больше некуда поставить
+            if state.score >= self.goal or grid.free_count == 0:
+                state.over = True
+                return state, WIN
+            event = EAT
+        
+        # Еда с истёкшим временем переходит в другую клетку
+        expiry = self._expiry
+        while expiry and expiry[0][0] <= state.tick:
+            expires_at, index = heapq.heappop(expiry)
+            food = state.foods[index]
+            if food.expires_at != expires_at:
+                continue
+            previous = food.position
+            food.randomize_position()
+            diff.foods.append((previous, food.position))
+            self._schedule(food, index)
+        return state, event
\ No newline at end of file
@@ -0,0 +1,143 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from settings import Settings
+from replay import Replay
+
+# Порядок байтов пикселя в памяти для каждого набора масок 32-битной поверхности (little-endian)
+_PIXEL_FORMATS = {
+    (0xFF0000, 0xFF00, 0xFF, 0): "bgr0",
+    (0xFF0000, 0xFF00, 0xFF, 0xFF000000): "bgra",
+    (0xFF, 0xFF00, 0xFF0000, 0): "rgb0",
+    (0xFF, 0xFF00, 0xFF0000, 0xFF000000): "rgba",
+}
+
+def _init_worker():
+    """Запуск pygame без окна в процессе-исполнителе"""
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    import pygame
+    pygame.display.init()
+    pygame.font.init()
+    # Режим экрана нужен для convert() и convert_alpha() текстур
+    pygame.display.set_mode((1, 1))
+
+def _load_textures(replay):
+    """Возвращает фон и текстуры змейки и еды или None, если файлов нет"""
+    import pygame
+    from assets import textures
+    from snake import Snake
+    
+    size = (replay.block_size, replay.block_size)
+    # Фон размером с окно, как в игре: на большом поле камера повторяет его кусками
+    try:
+        background = textures.load('assets/background.jpg', (Settings.DIS_WIDTH, Settings.DIS_HEIGHT), alpha=False)
+    except Exception:
+        background = pygame.Surface((Settings.DIS_WIDTH, Settings.DIS_HEIGHT))
+        background.fill(Settings.BLUE)
+    try:
+        sprites = (textures.load('assets/food.png', size),
+                   textures.load('assets/snake_head.png', size),
+                   textures.load_rotated('assets/snake_head.png', size, Snake.HEAD_ANGLES),
+                   textures.load('assets/snake_body.png', size))
+    except Exception as e:
+        print(f"Ошибка загрузки текстур: {e}")
+        sprites = (None, None, None, None)
+    return background, sprites
+
+def _draw_frame(renderer, state):
+    """Рисует кадр так же, как игра: видимая камере часть поля и строка счёта"""
+    from assets import texts
+    
+    score_text = f"Счёт: {state.score} | Уровень: {Settings.LEVELS[state.level]['name']}"
+    renderer.render(state.snake, state.food, texts.render(Settings.SCORE_FONT, 35, score_text, Settings.WHITE))
+
+def export_replay(path, output_dir, fmt="raw", start=0, end=None):
+    """Записывает повтор кадрами, по кадру на тик; выполняется в процессе-исполнителе.
+    
+    fmt="raw" - один файл с кадрами подряд без заголовков, fmt="png" - папка с кадрами.
+    Возвращает словарь с описанием результата.
+    """
+    import numpy
+    import pygame
+    from renderer import CameraRenderer
+    
+    started = time.perf_counter()
+    replay = Replay.load(path)
+    end = replay.ticks if end is None else min(end, replay.ticks)
+    background, (food_texture, head_texture, head_rotations, body_texture) = _load_textures(replay)
+    # Поверхность в памяти размером с окно игры: кадры не проходят через экран, а поле
+    # любого размера показывается камерой, которая следует за головой змейки
+    surface = pygame.Surface((Settings.DIS_WIDTH, Settings.DIS_HEIGHT), 0, 32)
+    renderer = CameraRenderer(surface, background, Settings.GREEN, Settings.RED,
+                              outside_color=Settings.BLACK, wall_color=Settings.GRAY)
+    name = os.path.splitext(os.path.basename(path))[0]
+    
+    engine = replay.seek(start)
+    state = engine.state
+    state.snake.head_texture = head_texture
+    state.snake.head_rotations = head_rotations
+    state.snake.body_texture = body_texture
+    for food in state.foods:
+        food.food_texture = food_texture
+    frames = 0
+    if fmt == "raw":
+        output = os.path.join(output_dir, name + ".raw")
+        out = open(output, "wb", buffering=1 << 20)
+    else:
+        output = os.path.join(output_dir, name)
+        os.makedirs(output, exist_ok=True)
+        out = None
+    try:
+        for tick in range(start, end + 1):
+            replay.advance(engine, tick)
+            _draw_frame(renderer, state)
+            if out is not None:
+                # pixels2d - представление памяти поверхности без копирования; после
+                # транспонирования строки идут подряд, и массив пишется в файл как есть
+                # (копия нужна, только если в строках поверхности есть выравнивание)
+                pixels = pygame.surfarray.pixels2d(surface)
+                out.write(numpy.ascontiguousarray(pixels.T))
+                del pixels
+            else:
+                pygame.image.save(surface, os.path.join(output, f"{frames:06d}.png"))
+            frames += 1
+    finally:
+        if out is not None:
+            out.close()
+    
+    return {
+        "replay": path,
+        "output": output,
+        "frames": frames,
+        "size": surface.get_size(),
+        "fps": Settings.LEVELS[replay.level]["speed"],
+        "pixel_format": _PIXEL_FORMATS.get(surface.get_masks()),
+        "seconds": time.perf_counter() - started,
+    }
+
+def export_all(paths, output_dir, fmt="raw", workers=None, start=0, end=None):
+    """Экспортирует повторы параллельно, по одному повтору на процесс; результаты выдаются в порядке файлов"""
+    os.makedirs(output_dir, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        futures = [pool.submit(export_replay, path, output_dir, fmt, start, end) for path in paths]
+        for future in futures:
+            yield future.result()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Экспорт повторов в кадры или raw-видео")
+    parser.add_argument("paths", nargs="+", help="файлы повторов")
+    parser.add_argument("-o", "--output", default="export", help="папка для результатов")
+    parser.add_argument("--format", choices=("raw", "png"), default="raw",
+                        help="raw - кадры подряд в одном файле, png - папка с кадрами")
+    parser.add_argument("--workers", type=int, default=None, help="число процессов")
+    parser.add_argument("--start", type=int, default=0, help="первый тик")
+    parser.add_argument("--end", type=int, default=None, help="последний тик")
+    args = parser.parse_args()
+    
+    for result in export_all(args.paths, args.output, args.format, args.workers, args.start, args.end):
+        width, height = result["size"]
+        print(f"{result['replay']}: {result['frames']} кадров за {result['seconds']:.1f} с -> {result['output']}")
+        if args.format == "raw":
+            print(f"  ffmpeg -f rawvideo -pixel_format {result['pixel_format']} -video_size {width}x{height} "
+                  f"-framerate {result['fps']} -i {result['output']} video.mp4")
\ No newline at end of file
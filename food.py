@@ -1,22 +1,65 @@
-import pygame
 import random
+from grid import Grid
 
 class Food:
-    def __init__(self, dis_width, dis_height, block_size, food_texture=None):
+    __slots__ = ("block_size", "dis_width", "dis_height", "food_texture", "grid", "rng", "position", "board_full",
+                 "expires_at")
+    
+    def __init__(self, dis_width, dis_height, block_size, food_texture=None, grid=None, rng=None):
         self.block_size = block_size
         self.dis_width = dis_width
         self.dis_height = dis_height
         self.food_texture = food_texture
-        self.position = (0, 0)
+        # Общая со змейкой сетка, по которой выбираются свободные клетки
+        if grid is None:
+            grid = Grid(dis_width // block_size, dis_height // block_size, block_size)
+        self.grid = grid
+        # Генератор случайных чисел; свой экземпляр делает игру воспроизводимой
+        self.rng = rng if rng is not None else random
+        # Тик, на котором еда исчезнет и появится в другом месте; None - еда постоянная
+        self.expires_at = None
+        self.position = None
+        self.board_full = False
         self.randomize_position()
     
     def randomize_position(self):
-        x = round(random.randrange(0, self.dis_width - self.block_size) / self.block_size) * self.block_size
-        y = round(random.randrange(0, self.dis_height - self.block_size) / self.block_size) * self.block_size
-        self.position = (x, y)
+        """Ставит еду в случайную свободную клетку без другой еды, возвращает False, если такой нет"""
+        self._unregister()
+        cell = self.grid.random_empty(self.rng)
+        if cell is None:
+            self.position = None
+            self.board_full = True
+            return False
+        self.position = self.grid.pos_of(cell)
+        self.board_full = False
+        self.grid.foods[cell] = self
+        return True
+    
+    def place(self, position):
+        """Ставит еду в заданную позицию, например из снимка состояния; None - еды нет"""
+        self._unregister()
+        self.position = position
+        self.board_full = position is None
+        if position is not None:
+            self.grid.foods[self.grid.cell_of(position)] = self
+    
+    def _unregister(self):
+        """Убирает еду из сетки, если клетку не заняла другая еда"""
+        if self.position is None:
+            return
+        cell = self.grid.cell_of(self.position)
+        if self.grid.foods.get(cell) is self:
+            del self.grid.foods[cell]
     
-    def draw(self, surface, color):
+    def draw(self, surface, color, offset=(0, 0)):
+        """Рисует еду; offset - сдвиг поля на экране, например от камеры"""
+        import pygame
+        
+        if self.position is None:
+            return
+        x = self.position[0] + offset[0]
+        y = self.position[1] + offset[1]
         if self.food_texture:
-            surface.blit(self.food_texture, self.position)
+            surface.blit(self.food_texture, (x, y))
         else:
-            pygame.draw.rect(surface, color, [self.position[0], self.position[1], self.block_size, self.block_size])
\ No newline at end of file
+            pygame.draw.rect(surface, color, [x, y, self.block_size, self.block_size])
\ No newline at end of file
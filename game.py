@@ -1,44 +1,125 @@
 import pygame
-import json
+import argparse
 import os
+import threading
+import time
 from settings import Settings
+from engine import Engine, EAT, WIN, LOSE
 from snake import Snake
-from food import Food
+from assets import textures, texts
+from renderer import DirtyRenderer, CameraRenderer
+from profiler import StartupProfiler, FrameProfiler
+from records import RecordStore
+from replay import Replay, ReplayWriter
+from autopilot import Autopilot
 
 class Game:
-    def __init__(self):
-        # Инициализация pygame и микшера для звуков
-        pygame.init()
-        pygame.mixer.init()
+    def __init__(self, profile_startup=False, profile_frames=None, world=None):
+        # Замер этапов запуска; отчёт печатается с флагом --profile-startup
+        self.startup = StartupProfiler()
+        self.profile_startup = profile_startup
+        # Замер этапов кадра: включается оверлеем (F3) или флагом --profile-frames,
+        # который также выгружает сводки в JSONL (profile_frames - путь файла)
+        self.frame_profiler = FrameProfiler(
+            enabled=profile_frames is not None,
+            capacity=Settings.PROFILE_FRAMES,
+            export_path=profile_frames,
+            export_interval=Settings.PROFILE_EXPORT_INTERVAL
+        )
+        self.show_profile = False
+        self._profile_overlay = None
+        self._profile_updated = 0
+        
+        # Для меню нужны только дисплей и шрифты; звук и рекорды загружаются
+        # в фоновом потоке, фон и текстуры - при первой партии
+        with self.startup.stage("display"):
+            pygame.display.init()
+            pygame.font.init()
         
         # Загрузка настроек из settings.py
         self.settings = Settings()
         Settings.ensure_directories_exist()  # Создание необходимых директорий
         
-        # Флаг для отслеживания играющей музыки
+        # Флаги для отслеживания играющей и загруженной музыки
         self.music_playing = False
+        self.music_loaded = False
+        self.sound_enabled = False
+        self.sounds = {}
+        self.music_path = None
         
         # Создание игрового окна
-        self.dis = pygame.display.set_mode((self.settings.DIS_WIDTH, self.settings.DIS_HEIGHT))
-        pygame.display.set_caption('Змейка')
+        with self.startup.stage("window"):
+            self.dis = pygame.display.set_mode((self.settings.DIS_WIDTH, self.settings.DIS_HEIGHT))
+            pygame.display.set_caption('Змейка')
         
         # Инициализация игровых компонентов
         self.clock = pygame.time.Clock()
-        self.background = self._load_background()  # Загрузка фона
-        self._init_sounds()  # Инициализация звуков
-        self._load_progress()  # Загрузка прогресса игры
-        self.records = self._load_records()  # Загрузка рекордов
+        self.background = None  # Фон загружается при первой партии
+        self.renderer = None
+        # Отрисовщики поля: {рисуется ли поле через камеру: отрисовщик}
+        self._renderers = {}
+        with self.startup.stage("progress"):
+            # Рекорды и прогресс; прогресс нужен уже для меню
+            self.record_store = RecordStore(self.settings.RECORDS_DB)
+            self._load_progress()
+        self._loaded = threading.Event()
+        threading.Thread(target=self._load_in_background, name="startup", daemon=True).start()
         self.current_player = ""  # Текущий игрок
         self.current_level = 1  # Текущий уровень
-        self.reset_game()  # Сброс игры в начальное состояние
+        self._menu_cache = None  # Готовый экран меню выбора уровня
+        
+        # Действия клавиш; змейка берётся из текущей партии в момент нажатия
+        self.key_actions = {
+            pygame.K_LEFT: lambda: self.snake.change_direction("LEFT"),
+            pygame.K_RIGHT: lambda: self.snake.change_direction("RIGHT"),
+            pygame.K_UP: lambda: self.snake.change_direction("UP"),
+            pygame.K_DOWN: lambda: self.snake.change_direction("DOWN"),
+            pygame.K_m: self._toggle_sound,
+            pygame.K_F3: self._toggle_profile_overlay
+        }
+        # Размер поля в клетках: по умолчанию поле совпадает с окном, поле другого
+        # размера показывается камерой
+        cols, rows = world or self.settings.WORLD_SIZE or (self.settings.DIS_WIDTH // self.settings.BLOCK_SIZE,
+                                                           self.settings.DIS_HEIGHT // self.settings.BLOCK_SIZE)
+        # Игровая логика без pygame
+        self.engine = Engine(self.current_level, dis_width=cols * self.settings.BLOCK_SIZE,
+                             dis_height=rows * self.settings.BLOCK_SIZE)
+        if self.frame_profiler.enabled:
+            self.engine.profiler = self.frame_profiler
+        self.replay = None  # Запись текущей партии
+    
+    def _load_in_background(self):
+        """Инициализирует звук и загружает рекорды, пока на экране меню"""
+        # Событие ставится при любой ошибке: иначе _prepare_field ждал бы его вечно
+        try:
+            try:
+                with self.startup.stage("audio"):
+                    self._init_sounds()  # Инициализация звуков
+            except Exception as e:
+                print(f"Ошибка инициализации звука: {e}")
+                self.sounds = {}
+                self.music_path = None
+            try:
+                with self.startup.stage("records"):
+                    self.record_store.preload()  # Загрузка рекордов уровней
+            except Exception as e:
+                # Рекорды будут прочитаны из базы при первом обращении
+                print(f"Ошибка загрузки рекордов: {e}")
+        finally:
+            self._loaded.set()
+        self._report_startup()
+    
+    def _report_startup(self):
+        """Печатает отчёт о запуске, когда меню показано и фоновая загрузка завершена"""
+        if self.profile_startup and self._loaded.is_set() and "first_frame" in self.startup.marks:
+            self.startup.print_report_once()
     
     def _load_background(self):
         """Загружает фоновое изображение или создает синий фон по умолчанию"""
         try:
             bg_path = 'assets/background.jpg'
             if os.path.exists(bg_path):
-                background = pygame.image.load(bg_path).convert()
-                return pygame.transform.scale(background, (self.settings.DIS_WIDTH, self.settings.DIS_HEIGHT))
+                return textures.load(bg_path, (self.settings.DIS_WIDTH, self.settings.DIS_HEIGHT), alpha=False)
         except Exception as e:
             print(f"Ошибка загрузки фона: {e}")
         
@@ -48,128 +129,196 @@ class Game:
         return background
     
     def _init_sounds(self):
-        """Инициализирует звуковые эффекты игры"""
-        self.sound_enabled = True
-        self.sounds = {}  # Словарь для хранения звуков
+        """Инициализирует микшер и звуковые эффекты игры"""
+        self.sounds = {}  # Словарь для хранения коротких эффектов
+        self.music_path = None  # Фоновая музыка читается потоком через pygame.mixer.music
         
         try:
-            # Загрузка звуков из настроек
+            # Частота микшера совпадает с частотой звуковых файлов, поэтому
+            # эффекты не пересчитываются по частоте; моно-эффекты только
+            # дублируются в оба канала при загрузке
+            pygame.mixer.pre_init(
+                self.settings.MIXER_FREQUENCY,
+                self.settings.MIXER_SIZE,
+                self.settings.MIXER_CHANNELS,
+                self.settings.MIXER_BUFFER
+            )
+            pygame.mixer.init()
+            
+            # Загрузка звуков из настроек: в памяти остаются только эффекты,
+            # уже приведённые к формату микшера
             for name, path in self.settings.SOUND_FILES.items():
-                if os.path.exists(path):
+                if name == 'background':
+                    if os.path.exists(path):
+                        self.music_path = path
+                elif os.path.exists(path):
                     self.sounds[name] = pygame.mixer.Sound(path)
                 else:
                     # Создание пустого звука, если файл не найден
                     self.sounds[name] = pygame.mixer.Sound(buffer=bytes(44))
+            self.sound_enabled = True
         except Exception as e:
             print(f"Ошибка загрузки звуков: {e}")
             self.sound_enabled = False
     
     def _load_progress(self):
-        """Загружает прогресс игрока из файла"""
-        try:
-            if os.path.exists("progress.json"):
-                with open("progress.json", "r") as f:
-                    data = json.load(f)
-                    self.max_unlocked_level = data.get("max_unlocked_level", 1)
-            else:
-                self.max_unlocked_level = 1
-        except:
-            self.max_unlocked_level = 1
-    
-    def _load_records(self):
-        """Загружает таблицу рекордов из файла"""
-        try:
-            if os.path.exists("records.json"):
-                with open("records.json", "r") as f:
-                    return json.load(f)
-        except:
-            return {"levels": {}, "players": {}}
+        """Загружает прогресс игрока"""
+        self.max_unlocked_level = self.record_store.progress(default=1)
     
     def _save_progress(self):
-        """Сохраняет прогресс игрока в файл"""
-        with open("progress.json", "w") as f:
-            json.dump({"max_unlocked_level": self.max_unlocked_level}, f)
-    
-    def _save_records(self):
-        """Сохраняет таблицу рекордов в файл"""
-        with open("records.json", "w") as f:
-            json.dump(self.records, f)
+        """Сохраняет прогресс игрока; запись идёт в фоновом потоке"""
+        self.record_store.set_progress(self.max_unlocked_level)
     
     def reset_game(self):
         """Сбрасывает игру в начальное состояние"""
+        self._prepare_field()
+        # Рекорд в строке счёта учитывает результаты других игр на том же диске
+        self.record_store.refresh(self.current_level)
+        # Новая партия в движке и текстуры для её змейки и еды
+        self._finish_replay()
+        self.engine.reset(self.current_level)
+        self._start_replay()
+        self._apply_textures()
+        self.renderer.invalidate()
+        
+        # Воспроизведение фоновой музыки
+        self._start_music()
+    
+    def _prepare_field(self):
+        """Дожидается фоновой загрузки и выбирает отрисовщик для поля текущего движка;
+        фон и отрисовщики создаются при первом использовании"""
+        # Звук и рекорды нужны с первого тика партии
+        self._loaded.wait()
+        if self.background is None:
+            self.background = self._load_background()  # Загрузка фона
+        # Поле не по размеру окна показывает камера: большое - следуя за головой,
+        # меньшее - по центру окна с закрашенной областью за краем поля
+        camera = (self.engine.dis_width, self.engine.dis_height) != (self.settings.DIS_WIDTH,
+                                                                     self.settings.DIS_HEIGHT)
+        if camera not in self._renderers:
+            if camera:
+                self._renderers[camera] = CameraRenderer(
+                    self.dis,
+                    self.background,
+                    self.settings.GREEN,
+                    self.settings.RED,
+                    outside_color=self.settings.BLACK,
+                    wall_color=self.settings.GRAY
+                )
+            else:
+                self._renderers[camera] = DirtyRenderer(
+                    self.dis,
+                    self.background,
+                    self.settings.GREEN,
+                    self.settings.RED,
+                    dirty_rects=self.settings.DIRTY_RECTS,
+                    wall_color=self.settings.GRAY
+                )
+        self.renderer = self._renderers[camera]
+    
+    def _apply_textures(self):
+        """Назначает текстуры змейке и еде текущей партии"""
         try:
-            # Загрузка текстур для змейки и еды
-            food_texture = pygame.image.load('assets/food.png').convert_alpha()
-            food_texture = pygame.transform.scale(food_texture, (self.settings.BLOCK_SIZE, self.settings.BLOCK_SIZE))
-            head_texture = pygame.image.load('assets/snake_head.png').convert_alpha()
-            head_texture = pygame.transform.scale(head_texture, (self.settings.BLOCK_SIZE, self.settings.BLOCK_SIZE))
-            body_texture = pygame.image.load('assets/snake_body.png').convert_alpha()
-            body_texture = pygame.transform.scale(body_texture, (self.settings.BLOCK_SIZE, self.settings.BLOCK_SIZE))
+            # Текстуры для змейки и еды берутся из кэша и загружаются с диска только один раз
+            size = (self.settings.BLOCK_SIZE, self.settings.BLOCK_SIZE)
+            food_texture = textures.load('assets/food.png', size)
+            head_texture = textures.load('assets/snake_head.png', size)
+            head_rotations = textures.load_rotated('assets/snake_head.png', size, Snake.HEAD_ANGLES)
+            body_texture = textures.load('assets/snake_body.png', size)
         except Exception as e:
             print(f"Ошибка загрузки текстур: {e}")
-            food_texture = head_texture = body_texture = None
-        
-        # Создание змейки и еды
-        self.snake = Snake(
-            self.settings.DIS_WIDTH, 
-            self.settings.DIS_HEIGHT, 
-            self.settings.BLOCK_SIZE,
-            head_texture=head_texture,
-            body_texture=body_texture
-        )
-        self.food = Food(
-            self.settings.DIS_WIDTH, 
-            self.settings.DIS_HEIGHT, 
-            self.settings.BLOCK_SIZE,
-            food_texture=food_texture
-        )
+            food_texture = head_texture = body_texture = head_rotations = None
         
-        # Воспроизведение фоновой музыки
-        if self.sound_enabled and 'background' in self.sounds and not self.music_playing:
-            self.sounds['background'].play(-1)  # -1 означает бесконечный цикл
+        self.snake.head_texture = head_texture
+        self.snake.head_rotations = head_rotations
+        self.snake.body_texture = body_texture
+        for food in self.engine.state.foods:
+            food.food_texture = food_texture
+    
+    def _start_music(self):
+        """Запускает фоновую музыку; файл открывается при первом запуске"""
+        if not self.sound_enabled or self.music_path is None or self.music_playing:
+            return
+        try:
+            if not self.music_loaded:
+                pygame.mixer.music.load(self.music_path)
+                self.music_loaded = True
+                pygame.mixer.music.play(-1)  # -1 означает бесконечный цикл
+            else:
+                pygame.mixer.music.unpause()
             self.music_playing = True
+        except Exception as e:
+            print(f"Ошибка загрузки музыки: {e}")
+            self.music_path = None
+    
+    def _start_replay(self):
+        """Начинает запись повтора новой партии"""
+        if not self.settings.RECORD_REPLAYS:
+            return
+        engine = self.engine
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{engine.level}-{engine.seed}.snr"
+        try:
+            self.replay = ReplayWriter(os.path.join(self.settings.REPLAY_DIR, name), engine.level, engine.seed,
+                                       engine.dis_width, engine.dis_height, engine.block_size,
+                                       keyframe_interval=engine.keyframe_interval)
+        except OSError as e:
+            print(f"Ошибка записи повтора: {e}")
+            return
+        engine.recorder = self.replay
+    
+    def _finish_replay(self):
+        """Дописывает итог партии в повтор и закрывает файл"""
+        if self.replay is None:
+            return
+        state = self.engine.state
+        try:
+            self.replay.close(state.tick, state.score)
+        except OSError as e:
+            print(f"Ошибка записи повтора: {e}")
+        self.engine.recorder = self.replay = None
+    
+    @property
+    def snake(self):
+        return self.engine.state.snake
+    
+    @property
+    def food(self):
+        return self.engine.state.food
     
     def _update_record(self, player_name=None):
-        """Обновляет таблицу рекордов"""
+        """Обновляет таблицу рекордов; запись идёт в фоновом потоке"""
         current_score = len(self.snake.body) - 1
-        level_key = str(self.current_level)
-        
-        if player_name:
-            # Обновление рекордов для конкретного игрока
-            if "players" not in self.records:
-                self.records["players"] = {}
-            if level_key not in self.records["players"]:
-                self.records["players"][level_key] = []
-            
-            self.records["players"][level_key].append({
-                "name": player_name,
-                "score": current_score
-            })
-            # Сортировка и сохранение только топ-10 результатов
-            self.records["players"][level_key].sort(key=lambda x: x["score"], reverse=True)
-            self.records["players"][level_key] = self.records["players"][level_key][:10]
-        
-        # Обновление общего рекорда для уровня
-        if "levels" not in self.records:
-            self.records["levels"] = {}
-        
-        if current_score > self.records["levels"].get(level_key, 0):
-            self.records["levels"][level_key] = current_score
-        
-        self._save_records()
+        self.record_store.add(self.current_level, current_score, player_name or None)
     
     def _get_player_name(self):
         """Отображает экран ввода имени игрока"""
         input_active = True
         player_name = ""
-        font = pygame.font.SysFont(self.settings.FONT_STYLE, 40)
+        redraw = True
         
         while input_active:
-            for event in pygame.event.get():
+            # Экран перерисовывается только после изменения имени
+            if redraw:
+                self.dis.fill(self.settings.BLACK)
+                prompt = texts.render(self.settings.FONT_STYLE, 40, "Введите ваше имя:", self.settings.WHITE)
+                name_text = texts.render(self.settings.FONT_STYLE, 40, player_name, self.settings.WHITE)
+                
+                self.dis.blit(prompt, (self.settings.DIS_WIDTH//2 - prompt.get_width()//2, 
+                             self.settings.DIS_HEIGHT//2 - 50))
+                self.dis.blit(name_text, (self.settings.DIS_WIDTH//2 - name_text.get_width()//2, 
+                              self.settings.DIS_HEIGHT//2))
+                
+                pygame.display.flip()
+                redraw = False
+            
+            for event in self._wait_events():
                 if event.type == pygame.QUIT:
                     pygame.quit()
                     return None
                 
+                if event.type == pygame.VIDEOEXPOSE:
+                    redraw = True
+                
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_RETURN:
                         input_active = False
@@ -177,19 +326,7 @@ class Game:
                         player_name = player_name[:-1]
                     else:
                         player_name += event.unicode
-            
-            # Отрисовка экрана ввода имени
-            self.dis.fill(self.settings.BLACK)
-            prompt = font.render("Введите ваше имя:", True, self.settings.WHITE)
-            name_text = font.render(player_name, True, self.settings.WHITE)
-            
-            self.dis.blit(prompt, (self.settings.DIS_WIDTH//2 - prompt.get_width()//2, 
-                         self.settings.DIS_HEIGHT//2 - 50))
-            self.dis.blit(name_text, (self.settings.DIS_WIDTH//2 - name_text.get_width()//2, 
-                          self.settings.DIS_HEIGHT//2))
-            
-            pygame.display.flip()
-            self.clock.tick(30)
+                    redraw = True
         
         return player_name if player_name else "Игрок"
     
@@ -198,46 +335,57 @@ class Game:
         if level is None:
             level = self.current_level
         
-        showing = True
-        font_title = pygame.font.SysFont(self.settings.FONT_STYLE, 40)
-        font_item = pygame.font.SysFont(self.settings.FONT_STYLE, 30)
+        # Результаты других игр, пишущих в ту же базу
+        self.record_store.refresh(level)
+        # Таблица не меняется, пока открыта, поэтому рисуется один раз
+        screen = self._render_leaderboard(level)
+        self.dis.blit(screen, (0, 0))
+        pygame.display.flip()
         
-        while showing:
-            for event in pygame.event.get():
+        while True:
+            for event in self._wait_events():
                 if event.type == pygame.QUIT:
                     pygame.quit()
                     return False
                 if event.type == pygame.KEYDOWN or event.type == pygame.MOUSEBUTTONDOWN:
-                    showing = False
-            
-            self.dis.fill(self.settings.BLACK)
-            
-            title = font_title.render(f"Таблица рекордов (Уровень {level})", True, self.settings.WHITE)
-            self.dis.blit(title, (self.settings.DIS_WIDTH//2 - title.get_width()//2, 30))
-            
-            y_offset = 100
-            level_key = str(level)
-            
-            # Отрисовка рекордов
-            if "players" in self.records and level_key in self.records["players"]:
-                for i, record in enumerate(self.records["players"][level_key]):
-                    if i >= 10: break
-                    record_text = f"{i+1}. {record['name']}: {record['score']}"
-                    text = font_item.render(record_text, True, self.settings.WHITE)
-                    self.dis.blit(text, (self.settings.DIS_WIDTH//2 - text.get_width()//2, y_offset))
-                    y_offset += 40
-            else:
-                no_records = font_item.render("Рекордов пока нет!", True, self.settings.WHITE)
-                self.dis.blit(no_records, (self.settings.DIS_WIDTH//2 - no_records.get_width()//2, y_offset))
-            
-            hint = font_item.render("Нажмите любую клавишу для продолжения", True, self.settings.WHITE)
-            self.dis.blit(hint, (self.settings.DIS_WIDTH//2 - hint.get_width()//2, 
-                              self.settings.DIS_HEIGHT - 50))
-            
-            pygame.display.flip()
-            self.clock.tick(30)
+                    return True
+                if event.type == pygame.VIDEOEXPOSE:
+                    self.dis.blit(screen, (0, 0))
+                    pygame.display.flip()
+    
+    def _render_leaderboard(self, level):
+        """Рисует экран таблицы рекордов на отдельной поверхности"""
+        screen = pygame.Surface((self.settings.DIS_WIDTH, self.settings.DIS_HEIGHT))
+        screen.fill(self.settings.BLACK)
         
-        return True
+        title = texts.render(self.settings.FONT_STYLE, 40, f"Таблица рекордов (Уровень {level})", self.settings.WHITE)
+        screen.blit(title, (self.settings.DIS_WIDTH//2 - title.get_width()//2, 30))
+        
+        y_offset = 100
+        records = self.record_store.top(level, 10)
+        
+        # Отрисовка рекордов
+        if records:
+            for i, (name, score) in enumerate(records):
+                record_text = f"{i+1}. {name}: {score}"
+                text = texts.render(self.settings.FONT_STYLE, 30, record_text, self.settings.WHITE)
+                screen.blit(text, (self.settings.DIS_WIDTH//2 - text.get_width()//2, y_offset))
+                y_offset += 40
+        else:
+            no_records = texts.render(self.settings.FONT_STYLE, 30, "Рекордов пока нет!", self.settings.WHITE)
+            screen.blit(no_records, (self.settings.DIS_WIDTH//2 - no_records.get_width()//2, y_offset))
+        
+        hint = texts.render(self.settings.FONT_STYLE, 30, "Нажмите любую клавишу для продолжения", self.settings.WHITE)
+        screen.blit(hint, (self.settings.DIS_WIDTH//2 - hint.get_width()//2, 
+                          self.settings.DIS_HEIGHT - 50))
+        return screen
+    
+    def _wait_events(self):
+        """Ждёт событие, не нагружая процессор, и возвращает его вместе с уже накопившимися"""
+        event = pygame.event.wait(self.settings.MENU_WAIT_MS)
+        if event.type == pygame.NOEVENT:
+            return []
+        return [event] + pygame.event.get()
     
     def _play_sound(self, sound_name):
         """Воспроизводит звуковой эффект"""
@@ -249,97 +397,78 @@ class Game:
         self.sound_enabled = not self.sound_enabled
         if self.sound_enabled:
             pygame.mixer.unpause()
-            if not self.music_playing and 'background' in self.sounds:
-                self.sounds['background'].play(-1)
-                self.music_playing = True
+            self._start_music()
         else:
             pygame.mixer.pause()
+            pygame.mixer.music.pause()
             self.music_playing = False
     
     def show_score(self):
         """Отображает текущий счет, рекорд и уровень"""
+        self.dis.blit(self._score_surface(), [10, 10])
+    
+    def _score_surface(self):
+        """Возвращает отрисованную строку счёта"""
         score = len(self.snake.body) - 1
         level = self.current_level
-        record = self.records["levels"].get(str(level), 0) if "levels" in self.records else 0
+        record = self.record_store.best(level)
         
-        font = pygame.font.SysFont(self.settings.SCORE_FONT, 35)
         score_text = f"Счёт: {score} | Рекорд: {record} | Уровень: {self.settings.LEVELS[level]['name']}"
-        text = font.render(score_text, True, self.settings.WHITE)
-        self.dis.blit(text, [10, 10])
+        return texts.render(self.settings.SCORE_FONT, 35, score_text, self.settings.WHITE)
     
     def show_message(self, text, color, y_offset=0, font_size=25):
         """Отображает сообщение на экране"""
-        font = pygame.font.SysFont(self.settings.FONT_STYLE, font_size)
-        message = font.render(text, True, color)
+        message = texts.render(self.settings.FONT_STYLE, font_size, text, color)
         x_pos = self.settings.DIS_WIDTH // 2 - message.get_width() // 2
         y_pos = self.settings.DIS_HEIGHT // 3 + y_offset
         self.dis.blit(message, [x_pos, y_pos])
     
     def level_selection_menu(self):
         """Отображает меню выбора уровня"""
-        menu = True
         show_leaderboard = False
+        redraw = True
+        idle_since = pygame.time.get_ticks()
         
-        while menu:
-            self.dis.fill(self.settings.BLUE)
+        while True:
+            # Демонстрационная игра, пока к автомату никто не подходит
+            idle_ms = self.settings.ATTRACT_IDLE_MS
+            if idle_ms and pygame.time.get_ticks() - idle_since >= idle_ms:
+                if not self._attract_mode():
+                    return False
+                idle_since = pygame.time.get_ticks()
+                redraw = True
             
             if show_leaderboard:
                 if not self._show_leaderboard(self.current_level):
                     return False
                 show_leaderboard = False
-                continue
-            
-            title_font = pygame.font.SysFont(self.settings.FONT_STYLE, 30)
-            title_text = title_font.render("Выберите уровень сложности", True, self.settings.WHITE)
-            self.dis.blit(title_text, [self.settings.DIS_WIDTH//2 - title_text.get_width()//2, 50])
-            
-            level_buttons = []
-            font = pygame.font.SysFont(self.settings.FONT_STYLE, 25)
-            
-            # Создание кнопок для каждого уровня
-            for i, level in self.settings.LEVELS.items():
-                color = self.settings.GREEN if i <= self.max_unlocked_level else self.settings.RED
-                level_text = f"{i}. {level['name']} (Скорость: {level['speed']}, Цель: {level['goal']})"
-                text = font.render(level_text, True, color)
-                
-                button_x = self.settings.DIS_WIDTH//2 - text.get_width()//2 - 10
-                button_y = 150 + i * 50 - 5
-                
-                pygame.draw.rect(self.dis, color, 
-                               [button_x, button_y, 
-                                text.get_width() + 20, text.get_height() + 10], 2)
-                self.dis.blit(text, [button_x + 10, button_y + 5])
-                
-                level_buttons.append((i, pygame.Rect(button_x, button_y, 
-                                               text.get_width() + 20, text.get_height() + 10)))
-            
-            # Кнопка таблицы рекордов
-            records_font = pygame.font.SysFont(self.settings.FONT_STYLE, 25)
-            records_text = records_font.render("Таблица рекордов (R)", True, self.settings.WHITE)
-            records_rect = pygame.Rect(
-                self.settings.DIS_WIDTH//2 - records_text.get_width()//2 - 10,
-                self.settings.DIS_HEIGHT - 100,
-                records_text.get_width() + 20,
-                records_text.get_height() + 10
-            )
-            pygame.draw.rect(self.dis, self.settings.GOLD, records_rect, 2)
-            self.dis.blit(records_text, [
-                self.settings.DIS_WIDTH//2 - records_text.get_width()//2,
-                self.settings.DIS_HEIGHT - 95
-            ])
+                redraw = True
             
-            pygame.display.update()
+            # Готовый экран меню выводится только при открытии и после изменений
+            screen, level_buttons, records_rect = self._render_level_menu()
+            if redraw:
+                self.dis.blit(screen, (0, 0))
+                pygame.display.update()
+                redraw = False
+                self.startup.mark("first_frame")
+                self._report_startup()
             
             # Обработка событий в меню
-            for event in pygame.event.get():
+            events = self._wait_events()
+            if events:
+                idle_since = pygame.time.get_ticks()
+            for event in events:
                 if event.type == pygame.QUIT:
                     pygame.quit()
                     return False
                 
+                if event.type == pygame.VIDEOEXPOSE:
+                    redraw = True
+                
                 if event.type == pygame.KEYDOWN:
-                    if pygame.K_1 <= event.key <= pygame.K_3:
+                    if pygame.K_1 <= event.key <= pygame.K_9:
                         level = event.key - pygame.K_0
-                        if level <= self.max_unlocked_level:
+                        if level in self.settings.LEVELS and level <= self.max_unlocked_level:
                             self.current_level = level
                             self.snake_speed = self.settings.LEVELS[level]["speed"]
                             return True
@@ -347,7 +476,7 @@ class Game:
                         show_leaderboard = True
                 
                 if event.type == pygame.MOUSEBUTTONDOWN:
-                    mouse_pos = pygame.mouse.get_pos()
+                    mouse_pos = event.pos
                     for level, button in level_buttons:
                         if button.collidepoint(mouse_pos) and level <= self.max_unlocked_level:
                             self.current_level = level
@@ -356,8 +485,53 @@ class Game:
                     
                     if records_rect.collidepoint(mouse_pos):
                         show_leaderboard = True
+    
+    def _render_level_menu(self):
+        """Возвращает экран меню, кнопки уровней и кнопку рекордов; экран кэшируется до открытия нового уровня"""
+        if self._menu_cache is not None and self._menu_cache[0] == self.max_unlocked_level:
+            return self._menu_cache[1:]
         
-        return True
+        screen = pygame.Surface((self.settings.DIS_WIDTH, self.settings.DIS_HEIGHT))
+        screen.fill(self.settings.BLUE)
+        
+        title_text = texts.render(self.settings.FONT_STYLE, 30, "Выберите уровень сложности", self.settings.WHITE)
+        screen.blit(title_text, [self.settings.DIS_WIDTH//2 - title_text.get_width()//2, 50])
+        
+        level_buttons = []
+        
+        # Создание кнопок для каждого уровня
+        for i, level in self.settings.LEVELS.items():
+            color = self.settings.GREEN if i <= self.max_unlocked_level else self.settings.RED
+            level_text = f"{i}. {level['name']} (Скорость: {level['speed']}, Цель: {level['goal']})"
+            text = texts.render(self.settings.FONT_STYLE, 25, level_text, color)
+            
+            button_x = self.settings.DIS_WIDTH//2 - text.get_width()//2 - 10
+            button_y = 150 + i * 50 - 5
+            
+            pygame.draw.rect(screen, color, 
+                           [button_x, button_y, 
+                            text.get_width() + 20, text.get_height() + 10], 2)
+            screen.blit(text, [button_x + 10, button_y + 5])
+            
+            level_buttons.append((i, pygame.Rect(button_x, button_y, 
+                                           text.get_width() + 20, text.get_height() + 10)))
+        
+        # Кнопка таблицы рекордов
+        records_text = texts.render(self.settings.FONT_STYLE, 25, "Таблица рекордов (R)", self.settings.WHITE)
+        records_rect = pygame.Rect(
+            self.settings.DIS_WIDTH//2 - records_text.get_width()//2 - 10,
+            self.settings.DIS_HEIGHT - 100,
+            records_text.get_width() + 20,
+            records_text.get_height() + 10
+        )
+        pygame.draw.rect(screen, self.settings.GOLD, records_rect, 2)
+        screen.blit(records_text, [
+            self.settings.DIS_WIDTH//2 - records_text.get_width()//2,
+            self.settings.DIS_HEIGHT - 95
+        ])
+        
+        self._menu_cache = (self.max_unlocked_level, screen, level_buttons, records_rect)
+        return screen, level_buttons, records_rect
     
     def _select_level(self, level):
         """Выбирает уровень и сбрасывает игру"""
@@ -367,38 +541,34 @@ class Game:
     
     def handle_events(self):
         """Обрабатывает события ввода"""
-        KEY_ACTIONS = {
-            pygame.K_LEFT: lambda: self.snake.change_direction("LEFT"),
-            pygame.K_RIGHT: lambda: self.snake.change_direction("RIGHT"),
-            pygame.K_UP: lambda: self.snake.change_direction("UP"),
-            pygame.K_DOWN: lambda: self.snake.change_direction("DOWN"),
-            pygame.K_m: self._toggle_sound
-        }
-        
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 return False
-            if event.type == pygame.KEYDOWN and event.key in KEY_ACTIONS:
-                KEY_ACTIONS[event.key]()
+            if event.type in (pygame.VIDEORESIZE, pygame.VIDEOEXPOSE):
+                self.renderer.invalidate()
+            if event.type == pygame.KEYDOWN and event.key in self.key_actions:
+                self.key_actions[event.key]()
         return True
     
     def _process_game_logic(self):
-        """Обрабатывает игровую логику"""
-        if not self.handle_events():
-            return False
-            
-        if self.snake.move(self.food.position):
+        """Выполняет один тик игровой логики, возвращает "win", "lose" или None"""
+        state, event = self.engine.step()
+        self.renderer.track(state.diff)
+        # Счётчики ввода обнуляются с новой партией, поэтому снимаются каждый тик
+        self.frame_profiler.record_input(state.snake)
+        
+        if event in (EAT, WIN):
             self._play_sound('eat')
-            self.food.randomize_position()
-            
-            current_score = len(self.snake.body) - 1
-            level_goal = self.settings.LEVELS[self.current_level]["goal"]
-            
-            if current_score >= level_goal:
-                self._handle_level_completion()
-                return "win"
-            
-        return True
+        if event in (WIN, LOSE):
+            self._finish_replay()
+            self.frame_profiler.end_game()
+        if event == WIN:
+            self._handle_level_completion()
+            return "win"
+        if event == LOSE:
+            self._play_sound('crash')
+            return "lose"
+        return None
     
     def _handle_level_completion(self):
         """Обрабатывает завершение уровня"""
@@ -412,9 +582,10 @@ class Game:
             self._update_record()
         else:
             # Только при проигрыше проверяем рекорд и запрашиваем имя
-            level_key = str(self.current_level)
             current_score = len(self.snake.body) - 1
-            current_record = self.records["levels"].get(level_key, 0) if "levels" in self.records else 0
+            # Рекорд мог обновить другой игрок на соседнем автомате
+            self.record_store.refresh(self.current_level)
+            current_record = self.record_store.best(self.current_level)
             
             if current_score > current_record:
                 player_name = self._get_player_name()
@@ -424,35 +595,17 @@ class Game:
                 else:
                     return "quit"
         
-        # Отображение меню после завершения игры
+        # Отображение меню после завершения игры: экран рисуется один раз
+        self._draw_game_end(win)
+        
         while True:
-            self.dis.fill(self.settings.BLACK)
-            
-            if win:
-                self.show_message(f"Уровень {self.current_level} пройден!", self.settings.GREEN)
-                options = [
-                    "N - следующий уровень",
-                    "M - вернуться в меню",
-                    "Q - выход"
-                ]
-            else:
-                self.show_message("Вы проиграли!", self.settings.RED)
-                options = [
-                    "C - заново",
-                    "M - вернуться в меню",
-                    "Q - выход"
-                ]
-            
-            for i, option in enumerate(options):
-                self.show_message(option, self.settings.WHITE, 50 + i * 40)
-            
-            self.show_score()
-            pygame.display.update()
-            
-            for event in pygame.event.get():
+            for event in self._wait_events():
                 if event.type == pygame.QUIT:
                     return "quit"
                 
+                if event.type == pygame.VIDEOEXPOSE:
+                    self._draw_game_end(win)
+                
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_q:
                         return "quit"
@@ -468,47 +621,237 @@ class Game:
                     if event.key == pygame.K_m:
                         return "menu"
     
-    def _render_game(self):
-        """Отрисовывает игровое поле"""
-        self.dis.blit(self.background, (0, 0))
-        self.food.draw(self.dis, self.settings.RED)
-        self.snake.draw(self.dis, self.settings.GREEN)
+    def _draw_game_end(self, win):
+        """Рисует экран завершения игры"""
+        self.dis.fill(self.settings.BLACK)
+        
+        if win:
+            self.show_message(f"Уровень {self.current_level} пройден!", self.settings.GREEN)
+            options = [
+                "N - следующий уровень",
+                "M - вернуться в меню",
+                "Q - выход"
+            ]
+        else:
+            self.show_message("Вы проиграли!", self.settings.RED)
+            options = [
+                "C - заново",
+                "M - вернуться в меню",
+                "Q - выход"
+            ]
+        
+        for i, option in enumerate(options):
+            self.show_message(option, self.settings.WHITE, 50 + i * 40)
+        
         self.show_score()
         pygame.display.update()
     
+    def _render_game(self, alpha=1.0):
+        """Отрисовывает игровое поле; alpha - доля тика, прошедшая после последнего хода"""
+        if not self.settings.INTERPOLATION:
+            alpha = 1.0
+        self.renderer.render(self.snake, self.food, self._score_surface(), alpha,
+                             overlay=self._profile_surface())
+    
+    def _toggle_profile_overlay(self):
+        """Показывает или скрывает замеры кадра; без --profile-frames замеры идут, только пока виден оверлей"""
+        self.show_profile = not self.show_profile
+        if self.frame_profiler.export_path is None:
+            self.frame_profiler.enabled = self.show_profile
+            self.engine.profiler = self.frame_profiler if self.show_profile else None
+    
+    def _profile_surface(self):
+        """Возвращает поверхность оверлея замеров или None, если он скрыт.
+        
+        Оверлей перестраивается не чаще PROFILE_OVERLAY_MS: между обновлениями
+        возвращается тот же объект, и отрисовщик не перерисовывает его область.
+        """
+        if not self.show_profile:
+            return None
+        now = pygame.time.get_ticks()
+        if self._profile_overlay is None or now - self._profile_updated >= self.settings.PROFILE_OVERLAY_MS:
+            lines = [texts.render(self.settings.PROFILE_FONT, 16, line, self.settings.WHITE)
+                     for line in self.frame_profiler.overlay_lines()]
+            height = sum(line.get_height() for line in lines)
+            overlay = pygame.Surface((max(line.get_width() for line in lines) + 8, height + 8))
+            overlay.fill(self.settings.BLACK)
+            y = 4
+            for line in lines:
+                overlay.blit(line, (4, y))
+                y += line.get_height()
+            self._profile_overlay = overlay
+            self._profile_updated = now
+        return self._profile_overlay
+    
+    def _attract_mode(self):
+        """Демонстрационная игра автопилота до нажатия клавиши; возвращает False, если окно закрыто"""
+        game_engine = self.engine
+        level = 1
+        self.engine = Engine(level)
+        self._prepare_field()
+        grid = self.engine.state.grid
+        autopilot = Autopilot(grid.cols, grid.rows)
+        step_ms = 1000 / self.settings.LEVELS[level]["speed"]
+        self._apply_textures()
+        self.renderer.invalidate()
+        accumulator = 0
+        self.clock.tick()
+        try:
+            while True:
+                accumulator += min(self.clock.tick(self.settings.RENDER_FPS), self.settings.MAX_FRAME_MS)
+                for event in pygame.event.get():
+                    if event.type == pygame.QUIT:
+                        return False
+                    if event.type in (pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN):
+                        return True
+                    if event.type in (pygame.VIDEORESIZE, pygame.VIDEOEXPOSE):
+                        self.renderer.invalidate()
+                
+                while accumulator >= step_ms:
+                    accumulator -= step_ms
+                    state = self.engine.state
+                    autopilot.control(state)
+                    state, event = self.engine.step()
+                    self.renderer.track(state.diff)
+                    if event in (WIN, LOSE):
+                        # Новая демонстрационная партия
+                        self.engine.reset(level)
+                        autopilot.reset()
+                        self._apply_textures()
+                        self.renderer.invalidate()
+                        accumulator = 0
+                
+                hud = texts.render(self.settings.SCORE_FONT, 25,
+                                   f"Демо | Счёт: {self.engine.state.score} | Нажмите любую клавишу",
+                                   self.settings.WHITE)
+                alpha = accumulator / step_ms if self.settings.INTERPOLATION else 1.0
+                self.renderer.render(self.snake, self.food, hud, alpha)
+        finally:
+            self.engine = game_engine
+            self._prepare_field()
+            self.renderer.invalidate()
+    
+    def view_replay(self, path):
+        """Просмотр повтора: Пробел - пауза, стрелки влево/вправо - на тик,
+        PageUp/PageDown - на REPLAY_SCRUB_TICKS, Home/End - начало и конец, Esc - выход.
+        
+        Возвращает False, если окно закрыто.
+        """
+        replay = Replay.load(path)
+        game_engine = self.engine
+        speed = self.settings.LEVELS[replay.level]["speed"]
+        scrub = {
+            pygame.K_LEFT: -1,
+            pygame.K_RIGHT: 1,
+            pygame.K_PAGEUP: -self.settings.REPLAY_SCRUB_TICKS,
+            pygame.K_PAGEDOWN: self.settings.REPLAY_SCRUB_TICKS
+        }
+        
+        # Перемотка при удержании клавиши
+        pygame.key.set_repeat(250, 30)
+        self.engine = replay.seek(0)
+        self._prepare_field()
+        self._apply_textures()
+        self.renderer.invalidate()
+        paused = False
+        accumulator = 0
+        self.clock.tick()
+        try:
+            while True:
+                accumulator += min(self.clock.tick(self.settings.RENDER_FPS), self.settings.MAX_FRAME_MS)
+                target = None
+                for event in pygame.event.get():
+                    if event.type == pygame.QUIT:
+                        return False
+                    if event.type in (pygame.VIDEORESIZE, pygame.VIDEOEXPOSE):
+                        self.renderer.invalidate()
+                    if event.type != pygame.KEYDOWN:
+                        continue
+                    tick = self.engine.state.tick if target is None else target
+                    if event.key in (pygame.K_ESCAPE, pygame.K_q):
+                        return True
+                    if event.key == pygame.K_SPACE:
+                        paused = not paused
+                    elif event.key in scrub:
+                        target = tick + scrub[event.key]
+                        paused = True
+                    elif event.key == pygame.K_HOME:
+                        target = 0
+                    elif event.key == pygame.K_END:
+                        target = replay.ticks
+                
+                if target is not None:
+                    # Перемотка начинается с ближайшего снимка, поле рисуется заново
+                    engine = replay.seek(target, self.engine)
+                    if engine is not self.engine:
+                        self.engine = engine
+                        self._apply_textures()
+                    self.renderer.invalidate()
+                    accumulator = 0
+                elif not paused:
+                    step_ms = 1000 / speed
+                    state = self.engine.state
+                    while accumulator >= step_ms and state.tick < replay.ticks and not state.over:
+                        replay.advance(self.engine, state.tick + 1)
+                        self.renderer.track(state.diff)
+                        accumulator -= step_ms
+                if paused or self.engine.state.tick >= replay.ticks:
+                    accumulator = 0
+                
+                state = self.engine.state
+                status = "пауза" if paused else "воспроизведение"
+                hud = texts.render(self.settings.SCORE_FONT, 25,
+                                   f"Повтор: тик {state.tick}/{replay.ticks} | Счёт: {state.score} | {status}",
+                                   self.settings.WHITE)
+                self.renderer.render(self.snake, self.food, hud, 1.0)
+        finally:
+            pygame.key.set_repeat()
+            self.engine = game_engine
+            self._prepare_field()
+            self.renderer.invalidate()
+    
     def game_loop(self):
         """Основной игровой цикл"""
         running = True
         while running:
             if not self.level_selection_menu():
                 break
+            self.reset_game()
             
+            # Логика идёт с фиксированным шагом по скорости уровня, а ввод
+            # и отрисовка - с частотой экрана
+            accumulator = 0
+            self.clock.tick()
+            profiler = self.frame_profiler
+            frame_started = time.perf_counter()
             game_active = True
             while game_active:
+                started = time.perf_counter()
+                accumulator += min(self.clock.tick(self.settings.RENDER_FPS), self.settings.MAX_FRAME_MS)
+                step_ms = 1000 / self.snake_speed
+                # Кадр - от выхода из clock.tick до выхода из следующего clock.tick
+                now = time.perf_counter()
+                profiler.record("sleep", now - started)
+                profiler.end_frame(now - frame_started)
+                frame_started = now
+                
                 if not self.handle_events():
                     running = False
                     break
+                started = time.perf_counter()
+                profiler.record("events", started - now)
                 
                 result = None
-                if self.snake.move(self.food.position):
-                    self._play_sound('eat')
-                    self.food.randomize_position()
-                    
-                    current_score = len(self.snake.body) - 1
-                    level_goal = self.settings.LEVELS[self.current_level]["goal"]
-                    
-                    if current_score >= level_goal:
-                        self._handle_level_completion()
-                        result = "win"
-                
-                if self.snake.check_collision():
-                    self._play_sound('crash')
-                    result = "lose"
+                while accumulator >= step_ms and result is None:
+                    result = self._process_game_logic()
+                    accumulator -= step_ms
                 
-                self._render_game()
-                self.clock.tick(self.snake_speed)
+                started = time.perf_counter()
+                self._render_game(1.0 if result else accumulator / step_ms)
+                profiler.record("render", time.perf_counter() - started)
                 
                 if result in ("win", "lose"):
+                    accumulator = 0
                     action = self._handle_game_end(win=(result == "win"))
                     if action == "quit":
                         running = False
@@ -517,11 +860,39 @@ class Game:
                         break
                     elif action == "retry":
                         self.reset_game()
-                    elif action == "continue":
-                        continue
-
+                    # Время, проведённое на экране завершения, не идёт в зачёт ходов
+                    self.clock.tick()
+                    frame_started = time.perf_counter()
+        
+        self._finish_replay()
+        self.frame_profiler.close()
+        self.record_store.close()  # Дописывает рекорды, ещё стоящие в очереди
         pygame.quit()
 
 if __name__ == "__main__":
-    game = Game()
-    game.game_loop()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Змейка")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="вывести время этапов запуска")
+    parser.add_argument("--replay", metavar="FILE",
+                        help="открыть повтор партии вместо игры")
+    parser.add_argument("--profile-frames", metavar="FILE",
+                        help="замерять этапы кадра и дописывать сводки в JSONL-файл")
+    parser.add_argument("--world", metavar="COLSxROWS",
+                        help="размер поля в клетках, например 5000x5000; большое поле показывается камерой")
+    args = parser.parse_args()
+    world = None
+    if args.world:
+        try:
+            world = tuple(int(value) for value in args.world.lower().split("x"))
+        except ValueError:
+            world = ()
+        if len(world) != 2 or min(world) < 2:
+            parser.error(f"неверный размер поля: {args.world}")
+    
+    game = Game(profile_startup=args.profile_startup, profile_frames=args.profile_frames, world=world)
+    if args.replay:
+        game.view_replay(args.replay)
+        game.record_store.close()
+        pygame.quit()
+    else:
+        game.game_loop()
\ No newline at end of file
@@ -0,0 +1,159 @@
+import random
+from array import array
+
+class Grid:
+    """Сетка игрового поля: занятость клеток, индекс свободных клеток, стены и еда.
+    
+    Стены занимают свои клетки навсегда, поэтому ход в стену - такое же
+    столкновение, как ход в тело. Еда клеток не занимает: она лежит в словаре
+    foods по клетке и проверяется одним поиском в словаре.
+    
+    Порядок индекса свободных клеток (8 байт на клетку) определяет, куда
+    встанет еда. rebuild_index строит его заново по одной лишь занятости,
+    поэтому снимки состояния порядок не хранят. На полях больше INDEX_LIMIT
+    клеток индекс появляется, только когда занята половина поля: до этого
+    свободная клетка находится случайными попытками, в среднем меньше чем
+    за две.
+    """
+    # Поля больше этого числа клеток получают индекс свободных клеток, только
+    # когда занята половина поля
+    INDEX_LIMIT = 1 << 20
+    # Тождественные перестановки по числу клеток: копия готового массива
+    # в сотни раз быстрее array('I', range(n)) при каждой новой партии
+    _identity = {}
+    # Таблица для bytes.translate: 1 в занятой клетке, 0 в свободной
+    _OCCUPIED = bytes([0] + [1] * 255)
+    
+    def __init__(self, cols, rows, block_size):
+        self.cols = cols
+        self.rows = rows
+        self.block_size = block_size
+        self.size = cols * rows
+        # Число объектов в каждой клетке
+        self.counts = bytearray(self.size)
+        # Перестановка клеток: первые free_count элементов - свободные клетки
+        self.free = None
+        # Позиция каждой клетки в массиве free
+        self.slot = None
+        self.free_count = self.size
+        if self.size <= self.INDEX_LIMIT:
+            self.rebuild_index()
+        # Клетки стен
+        self.walls = frozenset()
+        # Еда на поле: {клетка: объект еды}
+        self.foods = {}
+    
+    def cell_of(self, pos):
+        """Возвращает индекс клетки для координат в пикселях или None за пределами поля"""
+        col = pos[0] // self.block_size
+        row = pos[1] // self.block_size
+        if 0 <= col < self.cols and 0 <= row < self.rows:
+            return row * self.cols + col
+        return None
+    
+    def pos_of(self, cell):
+        """Возвращает координаты клетки в пикселях"""
+        row, col = divmod(cell, self.cols)
+        return (col * self.block_size, row * self.block_size)
+    
+    def is_occupied(self, cell):
+        """Проверяет, занята ли клетка"""
+        return self.counts[cell] > 0
+    
+    def occupy(self, cell):
+        """Занимает клетку, возвращает True, если она уже была занята"""
+        count = self.counts[cell]
+        if count == 0:
+            if self.free is not None:
+                self._swap(cell, self.free_count - 1)
+            self.free_count -= 1
+        self.counts[cell] = count + 1
+        return count > 0
+    
+    def release(self, cell):
+        """Освобождает клетку"""
+        count = self.counts[cell]
+        if count == 0:
+            return
+        self.counts[cell] = count - 1
+        if count == 1:
+            if self.free is not None:
+                self._swap(cell, self.free_count)
+            self.free_count += 1
+    
+    def random_free(self, rng=random):
+        """Возвращает случайную свободную клетку за O(1) или None, если поле заполнено"""
+        if self.free_count == 0:
+            return None
+        if self.free is None:
+            if 2 * self.free_count >= self.size:
+                return self._sample_free(rng)
+            self.rebuild_index()
+        return self.free[rng.randrange(self.free_count)]
+    
+    def random_empty(self, rng=random):
+        """Возвращает случайную свободную клетку без еды или None, если таких нет.
+        
+        Когда на поле нет другой еды, выбор совпадает с random_free. Иначе
+        выбор повторяется, пока не попадёт в клетку без еды: попыток в среднем
+        не больше, чем еды на поле, плюс одна.
+        """
+        foods = self.foods
+        if self.free_count - len(foods) <= 0:
+            return None
+        while True:
+            cell = self.random_free(rng)
+            if cell not in foods:
+                return cell
+    
+    def set_walls(self, cells):
+        """Ставит стены в клетки; вызывается на пустом поле перед появлением змейки"""
+        self.walls = frozenset(cells)
+        for cell in self.walls:
+            self.occupy(cell)
+    
+    def _sample_free(self, rng):
+        """Свободная клетка без индекса: случайные клетки до первой свободной.
+        
+        Вызывается, пока свободна хотя бы половина поля, так что попыток
+        в среднем меньше двух.
+        """
+        counts = self.counts
+        size = self.size
+        while True:
+            cell = rng.randrange(size)
+            if not counts[cell]:
+                return cell
+    
+    def rebuild_index(self):
+        """Строит индекс свободных клеток заново по занятости.
+        
+        Порядок зависит только от того, какие клетки заняты: из тождественной
+        перестановки занятые клетки по возрастанию уводятся в конец так же,
+        как это делает occupy. Большое поле, занятое меньше чем наполовину,
+        остаётся без индекса.
+        """
+        if self.size > self.INDEX_LIMIT and 2 * self.free_count >= self.size:
+            self.free = self.slot = None
+            return
+        identity = Grid._identity.get(self.size)
+        if identity is None:
+            identity = Grid._identity[self.size] = array('I', range(self.size))
+        self.free = identity[:]
+        self.slot = identity[:]
+        self.free_count = self.size
+        occupied = self.counts.translate(self._OCCUPIED)
+        cell = occupied.find(1)
+        while cell >= 0:
+            self._swap(cell, self.free_count - 1)
+            self.free_count -= 1
+            cell = occupied.find(1, cell + 1)
+    
+    def _swap(self, cell, index):
+        """Меняет местами клетку и элемент массива free с указанным индексом"""
+        other = self.free[index]
+        current = self.slot[cell]
+        self.free[current] = other
+        self.slot[other] = current
+        self.free[index] = cell
+        self.slot[cell] = index
\ No newline at end of file
@@ -0,0 +1,52 @@
+import json
+import os
+from functools import lru_cache
+
+# Описания уровней: {номер: {"name", "speed", "goal", ...}}. Необязательные поля:
+#   "border" - стена по краю поля;
+#   "walls" - прямоугольники стен [столбец, строка, ширина, высота] в клетках,
+#     отрицательные столбец и строка отсчитываются от правого и нижнего края;
+#   "foods" - сколько еды на поле одновременно (по умолчанию 1);
+#   "timed_foods" - сколько ещё еды исчезает через "food_ttl" тиков и появляется в другом месте
+LEVELS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "levels.json")
+
+@lru_cache(maxsize=None)
+def load_levels(path=LEVELS_FILE):
+    """Читает описания уровней из файла; файл читается один раз на процесс"""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    levels = {}
+    for number, level in data.items():
+        level = dict(level)
+        # Кортежи, чтобы описание стен можно было передать в кэшируемую wall_cells
+        level["walls"] = tuple(tuple(rect) for rect in level.get("walls", ()))
+        levels[int(number)] = level
+    return dict(sorted(levels.items()))
+
+@lru_cache(maxsize=64)
+def wall_cells(border, walls, cols, rows):
+    """Индексы клеток стен на поле cols x rows; результат кэшируется для каждого размера поля.
+    
+    Стартовая клетка змейки и клетка перед ней всегда остаются свободными.
+    """
+    cells = set()
+    if border:
+        for col in range(cols):
+            cells.add(col)
+            cells.add((rows - 1) * cols + col)
+        for row in range(rows):
+            cells.add(row * cols)
+            cells.add(row * cols + cols - 1)
+    for col, row, width, height in walls:
+        if col < 0:
+            col += cols
+        if row < 0:
+            row += rows
+        for y in range(max(row, 0), min(row + height, rows)):
+            for x in range(max(col, 0), min(col + width, cols)):
+                cells.add(y * cols + x)
+    # Старт как в Snake.reset: змейка появляется в центре и идёт вправо
+    start = round(rows / 2) * cols + round(cols / 2)
+    cells.discard(start)
+    cells.discard(start + 1)
+    return tuple(sorted(cells))
\ No newline at end of file
@@ -0,0 +1,143 @@
+import numpy as np
+
+# Значения клеток в канале поля
+EMPTY, BODY, HEAD, FOOD, WALL = range(5)
+# Порядок каналов направлений
+DIRECTIONS = ("UP", "DOWN", "LEFT", "RIGHT")
+
+_CODES = {direction: code for code, direction in enumerate(DIRECTIONS)}
+
+class Observation:
+    """Состояние партии движка в виде плотного массива uint8 (каналы, строки, столбцы).
+    
+    Канал 0 - содержимое клеток: EMPTY, BODY, HEAD, FOOD или WALL. С directions=True
+    каналы 1-4 отмечают единицей направление (DIRECTIONS) от сегмента к
+    следующему, ближе к голове, а у головы - направление последнего хода; по
+    ним восстанавливается порядок тела. После каждого тика update() меняет
+    только клетки головы, хвоста и еды; новая партия или пропущенные тики
+    ведут к полной перестройке. С history=K последние K кадров хранятся
+    в заранее выделенном кольце.
+    
+    Массивы возвращаются без копирования и только для чтения: следующий
+    update() перезаписывает их, поэтому сохранять кадр нужно копией.
+    """
+    def __init__(self, engine, directions=False, history=0):
+        self.engine = engine
+        grid = engine.state.grid
+        self.cols = grid.cols
+        self.rows = grid.rows
+        self.directions = directions
+        self.channels = 5 if directions else 1
+        self._frame = np.zeros((self.channels, self.rows, self.cols), dtype=np.uint8)
+        # Плоское представление того же массива: клетка - индекс Grid
+        self._flat = self._frame.reshape(self.channels, -1)
+        self._view = self._frame.view()
+        self._view.flags.writeable = False
+        # Каждый кадр пишется дважды, в слоты i и i + K: последние K кадров
+        # всегда лежат подряд, и история отдаётся срезом без копирования
+        self.history_size = history
+        self._ring = np.zeros((2 * history, self.channels, self.rows, self.cols), dtype=np.uint8)
+        self._ring_index = 0
+        # Партия и тик, которым соответствует кадр
+        self._state = None
+        self._tick = None
+        self.rebuilds = 0
+        self.update()
+    
+    @property
+    def frame(self):
+        """Текущий кадр (каналы, строки, столбцы)"""
+        return self._view
+    
+    @property
+    def cells(self):
+        """Канал содержимого клеток (строки, столбцы)"""
+        return self._view[0]
+    
+    def history(self):
+        """Последние history_size кадров (K, каналы, строки, столбцы), от старых к новым"""
+        if not self.history_size:
+            raise ValueError("История кадров не включена")
+        start = self._ring_index
+        view = self._ring[start:start + self.history_size]
+        view.flags.writeable = False
+        return view
+    
+    def update(self):
+        """Приводит кадр к текущему тику движка; возвращает кадр"""
+        state = self.engine.state
+        if state is self._state and state.tick == self._tick:
+            return self._view
+        if state is self._state and state.tick == self._tick + 1:
+            self._apply(state)
+            self._push()
+        else:
+            self._rebuild(state)
+            # История новой партии начинается с повторов первого кадра
+            for _ in range(self.history_size):
+                self._push()
+        self._state = state
+        self._tick = state.tick
+        return self._view
+    
+    def _apply(self, state):
+        """Изменения за один тик по state.diff"""
+        diff = state.diff
+        cell_of = state.grid.cell_of
+        flat = self._flat
+        cells = flat[0]
+        if diff.tail is not None:
+            tail = cell_of(diff.tail)
+            cells[tail] = EMPTY
+            if self.directions:
+                flat[1:, tail] = 0
+        # Прежняя голова остаётся телом, если только она не была хвостом змейки из одной клетки
+        direction = 1 + _CODES[state.snake.last_direction]
+        if diff.prev_head != diff.tail:
+            previous = cell_of(diff.prev_head)
+            cells[previous] = BODY
+            if self.directions:
+                flat[1:, previous] = 0
+                flat[direction, previous] = 1
+        head = cell_of(diff.head)
+        cells[head] = HEAD
+        if self.directions:
+            flat[direction, head] = 1
+        if diff.food_to is not None:
+            cells[cell_of(diff.food_to)] = FOOD
+        # Еда, переставленная по времени: прежняя клетка пустеет, если её не заняла голова
+        for previous, current in diff.foods:
+            if previous is not None and previous != diff.head:
+                cells[cell_of(previous)] = EMPTY
+            if current is not None:
+                cells[cell_of(current)] = FOOD
+    
+    def _rebuild(self, state):
+        """Строит кадр заново по стенам, телу змейки и еде"""
+        self.rebuilds += 1
+        flat = self._flat
+        flat.fill(0)
+        grid = state.grid
+        if grid.walls:
+            flat[0, list(grid.walls)] = WALL
+        # Клетки тела от головы к хвосту
+        index = np.frombuffer(state.snake.cells(), dtype=np.uint32)[::-1].astype(np.int64)
+        flat[0, index] = BODY
+        if grid.foods:
+            flat[0, list(grid.foods)] = FOOD
+        flat[0, index[0]] = HEAD
+        if self.directions:
+            # Направление от каждого сегмента к предыдущему, ближе к голове
+            step = index[:-1] - index[1:]
+            codes = np.where(step == -self.cols, 0, np.where(step == self.cols, 1, np.where(step == -1, 2, 3)))
+            flat[1 + codes, index[1:]] = 1
+            flat[1 + _CODES[state.snake.last_direction], index[0]] = 1
+    
+    def _push(self):
+        """Добавляет текущий кадр в кольцо истории"""
+        if not self.history_size:
+            return
+        i = self._ring_index
+        self._ring[i] = self._frame
+        self._ring[i + self.history_size] = self._frame
+        self._ring_index = (i + 1) % self.history_size
\ No newline at end of file
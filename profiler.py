@@ -0,0 +1,155 @@
+import json
+import threading
+import time
+from array import array
+from contextlib import contextmanager
+
+class StartupProfiler:
+    """Замер времени этапов запуска игры, в том числе выполняемых в фоновых потоках"""
+    def __init__(self):
+        self.started = time.perf_counter()
+        # (этап, поток, начало от старта, длительность) в секундах
+        self.stages = []
+        # Моменты от старта, например показ первого кадра меню
+        self.marks = {}
+        self._lock = threading.Lock()
+        self._reported = False
+    
+    @contextmanager
+    def stage(self, name):
+        """Замеряет длительность блока кода как этап запуска"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            with self._lock:
+                self.stages.append((name, threading.current_thread().name,
+                                    start - self.started, end - start))
+    
+    def mark(self, name):
+        """Запоминает момент от начала запуска; повторные отметки игнорируются"""
+        with self._lock:
+            self.marks.setdefault(name, time.perf_counter() - self.started)
+    
+    def report(self):
+        """Возвращает отчёт: этапы по времени начала и отметки"""
+        with self._lock:
+            stages = sorted(self.stages, key=lambda stage: stage[2])
+            marks = sorted(self.marks.items(), key=lambda mark: mark[1])
+        lines = ["Этапы запуска (мс):"]
+        for name, thread, start, duration in stages:
+            lines.append(f"  {name:<12} {duration * 1000:8.1f}  (с {start * 1000:.1f}, {thread})")
+        for name, moment in marks:
+            lines.append(f"  {name:<12} {moment * 1000:8.1f}  от старта")
+        return "\n".join(lines)
+    
+    def print_report_once(self):
+        """Печатает отчёт один раз, даже если вызывается из нескольких потоков"""
+        with self._lock:
+            if self._reported:
+                return
+            self._reported = True
+        print(self.report())
+
+class RingBuffer:
+    """Последние capacity значений в заранее выделенном массиве"""
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.values = array('d', bytes(8 * capacity))
+        self.index = 0
+        self.count = 0
+    
+    def append(self, value):
+        self.values[self.index] = value
+        self.index = (self.index + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+    
+    def percentiles(self, points):
+        """Возвращает значения для процентилей points (0-100) по накопленным значениям"""
+        if not self.count:
+            return [0.0] * len(points)
+        ordered = sorted(self.values[:self.count])
+        last = self.count - 1
+        return [ordered[min(last, round(point / 100 * last))] for point in points]
+
+class FrameProfiler:
+    """Время этапов кадра в кольцевых буферах: кадр целиком, события, ход, столкновения,
+    еда, отрисовка и ожидание в clock.tick, а также задержка ввода змейки.
+    
+    Выключенный профилировщик ничего не записывает. Периодические сводки
+    и итог ввода каждой партии можно выгружать в JSONL для анализа.
+    """
+    PHASES = ("frame", "events", "move", "collision", "food", "render", "sleep")
+    POINTS = (50, 95, 99)
+    
+    def __init__(self, enabled=True, capacity=600, export_path=None, export_interval=1.0):
+        self.enabled = enabled
+        self.buffers = {phase: RingBuffer(capacity) for phase in self.PHASES}
+        self.frames = 0
+        # Задержка ввода текущей партии (см. record_input) или None
+        self.input = None
+        self.export_path = export_path
+        self.export_interval = export_interval
+        self._export = open(export_path, "a") if enabled and export_path else None
+        self._last_export = time.perf_counter()
+    
+    def record(self, phase, seconds):
+        """Добавляет длительность этапа, с"""
+        if self.enabled:
+            self.buffers[phase].append(seconds)
+    
+    def record_input(self, snake):
+        """Запоминает задержку ввода змейки: счётчики обнуляются с новой партией"""
+        if self.enabled:
+            self.input = {
+                "turns": snake.input_latency_count,
+                "latency_mean": round(snake.mean_input_latency, 3),
+                "latency_max": snake.input_latency_max,
+                "dropped": snake.dropped_inputs,
+            }
+    
+    def end_game(self):
+        """Выгружает итог ввода завершённой партии"""
+        if self._export is not None and self.input is not None:
+            self._export.write(json.dumps({"time": round(time.time(), 3), "game_input": self.input}) + "\n")
+            self._export.flush()
+    
+    def end_frame(self, seconds):
+        """Записывает длительность кадра и при необходимости выгружает сводку"""
+        if not self.enabled:
+            return
+        self.buffers["frame"].append(seconds)
+        self.frames += 1
+        if self._export is not None:
+            now = time.perf_counter()
+            if now - self._last_export >= self.export_interval:
+                self._last_export = now
+                self._export.write(json.dumps(self.summary()) + "\n")
+                self._export.flush()
+    
+    def summary(self):
+        """Процентили длительности этапов в мс по последним кадрам"""
+        phases = {}
+        for phase, buffer in self.buffers.items():
+            values = buffer.percentiles(self.POINTS)
+            phases[phase] = {f"p{point}": round(value * 1000, 3) for point, value in zip(self.POINTS, values)}
+        return {"time": round(time.time(), 3), "frames": self.frames, "phases": phases, "input": self.input}
+    
+    def overlay_lines(self):
+        """Строки для вывода на экран: этап и p50/p95/p99 в мс"""
+        lines = [f"{'мс':<10}{'p50':>7}{'p95':>7}{'p99':>7}"]
+        for phase, buffer in self.buffers.items():
+            p50, p95, p99 = buffer.percentiles(self.POINTS)
+            lines.append(f"{phase:<10}{p50 * 1000:7.2f}{p95 * 1000:7.2f}{p99 * 1000:7.2f}")
+        if self.input is not None:
+            # Задержка в ходах от нажатия до поворота
+            lines.append(f"ввод: {self.input['latency_mean']:.2f} ср., {self.input['latency_max']} макс., "
+                         f"{self.input['dropped']} отброшено")
+        return lines
+    
+    def close(self):
+        if self._export is not None:
+            self._export.close()
+            self._export = None
\ No newline at end of file
@@ -0,0 +1,297 @@
+import bisect
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    id INTEGER PRIMARY KEY,
+    level INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    score INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scores_level_score ON scores (level, score DESC);
+CREATE TABLE IF NOT EXISTS level_best (
+    level INTEGER PRIMARY KEY,
+    score INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS progress (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+@contextmanager
+def _transaction(db, lock=None, committed=None):
+    """Транзакция с немедленной блокировкой записи: другие игры ждут её окончания.
+    
+    COMMIT и вызов committed() идут под lock, если он задан: читатель под тем
+    же lock видит записанное либо только в базе, либо только в своём кэше.
+    Транзакция откатывается и тогда, когда ошибкой завершился сам COMMIT.
+    """
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        yield db
+        with lock or nullcontext():
+            db.execute("COMMIT")
+            if committed is not None:
+                committed()
+    except BaseException:
+        if db.in_transaction:
+            db.execute("ROLLBACK")
+        raise
+
+class RecordStore:
+    """Таблица рекордов и прогресс игрока в SQLite.
+    
+    Чтение идёт из кэша в памяти, запись - в фоновом потоке одной транзакцией
+    на пачку изменений, поэтому сохранение не задерживает интерфейс, а сбой
+    во время записи не портит файл. Несколько запущенных игр могут работать
+    с одной базой: SQLite блокирует файл на время транзакции, а refresh()
+    подтягивает результаты других игр.
+    """
+    # Сколько лучших результатов уровня держится в памяти
+    TOP_SIZE = 10
+    # Сколько поток записи ждёт новые изменения, чтобы записать их одной транзакцией, с
+    BATCH_DELAY = 0.05
+    # Повторы записи пачки после ошибки SQLite и пауза перед первым повтором, с;
+    # пауза удваивается с каждой попыткой
+    WRITE_RETRIES = 5
+    RETRY_DELAY = 0.1
+    
+    def __init__(self, path, legacy_records="records.json", legacy_progress="progress.json"):
+        self.path = path
+        created = not os.path.exists(path)
+        self._lock = threading.Lock()
+        self._db = self._connect()
+        with _transaction(self._db):
+            for statement in _SCHEMA.split(";"):
+                if statement.strip():
+                    self._db.execute(statement)
+        if created:
+            self._import_legacy(legacy_records, legacy_progress)
+        
+        self._best = None
+        self._top = {}
+        # Результаты, ещё не записанные в базу: номер -> (уровень, имя, счёт)
+        self._pending = {}
+        self._next_pending = 0
+        self._writes = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="records", daemon=True)
+        self._writer.start()
+    
+    def _connect(self):
+        # timeout - сколько ждать, пока другая игра держит блокировку записи
+        db = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+        # Журнал WAL: читатели не ждут писателя, прерванная запись откатывается
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+    
+    def _import_legacy(self, records_path, progress_path):
+        """Переносит рекорды и прогресс из прежних JSON-файлов"""
+        try:
+            with open(records_path, "r") as f:
+                records = json.load(f) or {}
+        except (OSError, ValueError):
+            records = {}
+        try:
+            with open(progress_path, "r") as f:
+                progress = json.load(f) or {}
+        except (OSError, ValueError):
+            progress = {}
+        
+        with _transaction(self._db):
+            # Если базу одновременно создали несколько игр, перенос выполнит только одна
+            marker = self._db.execute(
+                "INSERT OR IGNORE INTO progress (key, value) VALUES ('legacy_imported', 1)"
+            )
+            if marker.rowcount == 0:
+                return
+            for level, entries in records.get("players", {}).items():
+                self._db.executemany(
+                    "INSERT INTO scores (level, name, score) VALUES (?, ?, ?)",
+                    [(int(level), entry["name"], entry["score"]) for entry in entries]
+                )
+            for level, score in records.get("levels", {}).items():
+                self._db.execute(
+                    "INSERT OR REPLACE INTO level_best (level, score) VALUES (?, ?)",
+                    (int(level), score)
+                )
+            if "max_unlocked_level" in progress:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO progress (key, value) VALUES ('max_unlocked_level', ?)",
+                    (progress["max_unlocked_level"],)
+                )
+    
+    def preload(self):
+        """Загружает рекорды уровней в память"""
+        with self._lock:
+            if self._best is None:
+                self._best = dict(self._db.execute("SELECT level, score FROM level_best"))
+    
+    def best(self, level):
+        """Возвращает рекорд уровня"""
+        self.preload()
+        return self._best.get(level, 0)
+    
+    def top(self, level, k=TOP_SIZE):
+        """Возвращает лучшие результаты уровня: список (имя, счёт) по убыванию счёта"""
+        with self._lock:
+            return self._load_top(level)[:k]
+    
+    def _load_top(self, level):
+        """Возвращает закэшированные лучшие результаты уровня, при необходимости читая их из базы"""
+        top = self._top.get(level)
+        if top is None:
+            # Индекс (level, score DESC) отдаёт первые строки без сортировки таблицы
+            top = self._db.execute(
+                "SELECT name, score FROM scores WHERE level = ? ORDER BY score DESC, id LIMIT ?",
+                (level, self.TOP_SIZE)
+            ).fetchall()
+            self._top[level] = top
+        return top
+    
+    def refresh(self, level=None):
+        """Перечитывает рекорды из базы, чтобы увидеть результаты других игр"""
+        with self._lock:
+            best = dict(self._db.execute("SELECT level, score FROM level_best"))
+            levels = list(self._top) if level is None else [level]
+            for key in levels:
+                self._top.pop(key, None)
+            # Свои результаты, которые ещё не записаны, остаются в кэше
+            for pending_level, name, score in self._pending.values():
+                if score > best.get(pending_level, 0):
+                    best[pending_level] = score
+                if name is not None and pending_level in levels:
+                    self._insert_top(self._load_top(pending_level), name, score)
+            self._best = best
+    
+    def add(self, level, score, name=None):
+        """Добавляет результат; без имени обновляется только рекорд уровня"""
+        self.preload()
+        with self._lock:
+            pending = self._next_pending
+            self._next_pending += 1
+            self._pending[pending] = (level, name, score)
+            if score > self._best.get(level, 0):
+                self._best[level] = score
+            if name is not None:
+                self._insert_top(self._load_top(level), name, score)
+        self._writes.put(("score", pending, level, name, score))
+    
+    def _insert_top(self, top, name, score):
+        """Вставляет результат в список лучших; он встаёт после равных ему, как и в запросе top()"""
+        scores = [-entry[1] for entry in top]
+        top.insert(bisect.bisect_right(scores, -score), (name, score))
+        del top[self.TOP_SIZE:]
+    
+    def progress(self, default=1):
+        """Возвращает максимальный открытый уровень"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value FROM progress WHERE key = 'max_unlocked_level'"
+            ).fetchone()
+        return row[0] if row else default
+    
+    def set_progress(self, max_unlocked_level):
+        """Сохраняет максимальный открытый уровень"""
+        self._writes.put(("progress", max_unlocked_level))
+    
+    def flush(self):
+        """Ждёт, пока все поставленные в очередь изменения будут записаны"""
+        self._writes.join()
+    
+    def close(self):
+        """Записывает оставшиеся изменения и закрывает базу"""
+        self._writes.put(None)
+        self._writer.join()
+        with self._lock:
+            self._db.close()
+    
+    def _write_loop(self):
+        """Фоновый поток записи: всё накопившееся в очереди пишется одной транзакцией"""
+        db = self._connect()
+        while True:
+            batch = [self._writes.get()]
+            # Короткое ожидание собирает несколько изменений в одну транзакцию
+            deadline = time.monotonic() + self.BATCH_DELAY
+            while batch[-1] is not None:
+                try:
+                    batch.append(self._writes.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+            try:
+                items = [item for item in batch if item is not None]
+                # Записанные результаты убираются из _pending вместе с COMMIT
+                if not self._write_with_retries(db, items):
+                    with self._lock:
+                        self._drop_pending(items)
+                    self._forget_unsaved()
+            finally:
+                for _ in batch:
+                    self._writes.task_done()
+            if None in batch:
+                db.close()
+                return
+    
+    def _write_with_retries(self, db, items):
+        """Пишет пачку, повторяя запись после ошибки с растущей паузой; возвращает False,
+        если пачку так и не удалось записать"""
+        for attempt in range(self.WRITE_RETRIES + 1):
+            try:
+                self._write_batch(db, items)
+                return True
+            except sqlite3.Error as e:
+                if attempt == self.WRITE_RETRIES:
+                    scores = sum(item[0] == "score" for item in items)
+                    print(f"Рекорды не сохранены после {attempt + 1} попыток: {e}; "
+                          f"потеряно результатов: {scores}")
+                    return False
+                delay = self.RETRY_DELAY * 2 ** attempt
+                print(f"Ошибка сохранения рекордов, повтор через {delay:.1f} с: {e}")
+                time.sleep(delay)
+    
+    def _drop_pending(self, items):
+        """Убирает результаты пачки из ещё не записанных; вызывается под _lock"""
+        for item in items:
+            if item[0] == "score":
+                self._pending.pop(item[1], None)
+    
+    def _forget_unsaved(self):
+        """Перечитывает кэш из базы, чтобы таблица не показывала несохранённые результаты"""
+        try:
+            self.refresh()
+        except sqlite3.Error:
+            # База недоступна: кэш будет прочитан при следующем обращении
+            with self._lock:
+                self._best = None
+                self._top.clear()
+    
+    def _write_batch(self, db, batch):
+        if not batch:
+            return
+        with _transaction(db, self._lock, lambda: self._drop_pending(batch)):
+            for item in batch:
+                if item[0] == "score":
+                    _, _, level, name, score = item
+                    if name is not None:
+                        db.execute(
+                            "INSERT INTO scores (level, name, score) VALUES (?, ?, ?)",
+                            (level, name, score)
+                        )
+                    db.execute(
+                        "INSERT INTO level_best (level, score) VALUES (?, ?) "
+                        "ON CONFLICT (level) DO UPDATE SET score = MAX(score, excluded.score)",
+                        (level, score)
+                    )
+                elif item[0] == "progress":
+                    db.execute(
+                        "INSERT INTO progress (key, value) VALUES ('max_unlocked_level', ?) "
+                        "ON CONFLICT (key) DO UPDATE SET value = MAX(value, excluded.value)",
+                        (item[1],)
+                    )
\ No newline at end of file
@@ -0,0 +1,271 @@
+import pygame
+from itertools import islice
+
+class DirtyRenderer:
+    """Отрисовка игрового поля с обновлением только изменившихся областей экрана.
+    
+    Голова рисуется между клетками с долей alpha пройденного тика, а сегмент,
+    покинувший клетку хвоста, втягивается в новый хвост; остальные сегменты,
+    включая новый хвост, стоят на месте, поэтому плавное движение не требует
+    перерисовки всего тела. Стены и вся еда поля берутся из сетки змейки.
+    """
+    # После такого числа накопленных клеток дешевле перерисовать кадр целиком
+    MAX_PENDING = 256
+    
+    def __init__(self, surface, background, snake_color, food_color, dirty_rects=True, wall_color=(90, 90, 90)):
+        self.surface = surface
+        self.background = background
+        self.snake_color = snake_color
+        self.food_color = food_color
+        self.wall_color = wall_color
+        # False - каждый кадр перерисовывается целиком
+        self.dirty_rects = dirty_rects
+        self.full_redraw = True
+        # Позиции клеток, изменившихся с прошлого кадра
+        self._pending = []
+        # Нарисованные поверх поля поверхности [(поверхность, область)]: строка счёта и оверлей
+        self._layers = []
+        # Откуда движутся голова и хвост в текущем тике (None - стоят на месте)
+        self._head_from = None
+        self._tail_from = None
+        # Области, где голова и хвост были нарисованы в прошлом кадре
+        self._sprite_rects = []
+        # Клетку нового хвоста нужно перерисовать в следующем кадре
+        self._tail_moved = False
+    
+    def invalidate(self):
+        """Требует полной перерисовки: новая партия, выход из меню, изменение окна"""
+        self.full_redraw = True
+        self._pending.clear()
+        self._head_from = self._tail_from = None
+        self._tail_moved = False
+    
+    def track(self, diff):
+        """Запоминает клетки, изменившиеся за тик движка"""
+        self._head_from = diff.prev_head
+        self._tail_from = diff.tail
+        if self.full_redraw:
+            return
+        for pos in (diff.head, diff.prev_head, diff.tail, diff.food_from, diff.food_to):
+            if pos is not None:
+                self._pending.append(pos)
+        # Новый хвост известен только змейке: он добавляется в render()
+        self._tail_moved = diff.tail is not None
+        for moved in diff.foods:
+            for pos in moved:
+                if pos is not None:
+                    self._pending.append(pos)
+        if len(self._pending) > self.MAX_PENDING:
+            self.invalidate()
+    
+    def render(self, snake, food, hud, alpha=1.0, hud_pos=(10, 10), overlay=None, overlay_pos=(10, 60)):
+        """Отрисовывает кадр; hud - поверхность строки счёта, alpha - доля пройденного тика,
+        overlay - необязательная поверхность поверх поля (например, замеры кадра).
+        Вся еда поля, включая food, берётся из сетки змейки"""
+        layers = [(hud, hud.get_rect(topleft=hud_pos))]
+        if overlay is not None:
+            layers.append((overlay, overlay.get_rect(topleft=overlay_pos)))
+        size = snake.block_size
+        sprites = self._sprites(snake, alpha)
+        sprite_rects = [pygame.Rect(pos[0], pos[1], size, size) for pos, _ in sprites]
+        
+        if self.full_redraw or not self.dirty_rects:
+            self.surface.blit(self.background, (0, 0))
+            grid = snake.grid
+            for cell in grid.walls:
+                self._draw_wall(grid.pos_of(cell), grid.block_size)
+            for item in grid.foods.values():
+                item.draw(self.surface, self.food_color)
+            # Неподвижная часть тела с хвостом, затем голова и ушедший хвост в промежуточных позициях
+            for segment in islice(snake.body, 1, None):
+                snake.draw_segment(self.surface, self.snake_color, segment, False)
+            for pos, is_head in sprites:
+                snake.draw_segment(self.surface, self.snake_color, pos, is_head)
+            for layer, rect in layers:
+                self.surface.blit(layer, rect)
+            pygame.display.update()
+            self.full_redraw = False
+            self._pending.clear()
+            self._layers = layers
+            self._sprite_rects = sprite_rects
+            self._tail_moved = False
+            return
+        
+        if self._tail_moved:
+            self._pending.append(snake.body[-1])
+            self._tail_moved = False
+        rects = [pygame.Rect(pos[0], pos[1], size, size) for pos in self._pending]
+        self._pending.clear()
+        # Голову и хвост нужно стереть с прошлого места и нарисовать на новом
+        rects.extend(self._sprite_rects)
+        rects.extend(sprite_rects)
+        self._sprite_rects = sprite_rects
+        # Строки из кэша текста переиспользуются, поэтому новый объект - новый текст;
+        # убранный слой стирается с прошлого места
+        for i in range(max(len(layers), len(self._layers))):
+            old = self._layers[i] if i < len(self._layers) else None
+            new = layers[i] if i < len(layers) else None
+            if new is None:
+                rects.append(old[1])
+            elif old is None:
+                rects.append(new[1])
+            elif new[0] is not old[0]:
+                rects.append(old[1].union(new[1]))
+        self._layers = layers
+        
+        for rect in rects:
+            self._redraw_area(rect, snake, sprites, sprite_rects)
+        pygame.display.update(rects)
+    
+    def _sprites(self, snake, alpha):
+        """Возвращает позиции головы и сегмента, покинувшего клетку хвоста, с учётом доли
+        пройденного тика; после alpha = 1 или роста змейки этот сегмент не рисуется"""
+        head = snake.body[0]
+        sprites = [(self._lerp(self._head_from, head, alpha), True)]
+        if len(snake.body) > 1 and self._tail_from is not None and alpha < 1:
+            sprites.append((self._lerp(self._tail_from, snake.body[-1], alpha), False))
+        return sprites
+    
+    def _draw_wall(self, pos, size):
+        """Рисует клетку стены в позиции на экране"""
+        pygame.draw.rect(self.surface, self.wall_color, [pos[0], pos[1], size, size])
+    
+    @staticmethod
+    def _lerp(start, end, alpha):
+        if start is None or alpha >= 1:
+            return end
+        return (round(start[0] + (end[0] - start[0]) * alpha),
+                round(start[1] + (end[1] - start[1]) * alpha))
+    
+    def _redraw_area(self, rect, snake, sprites, sprite_rects):
+        """Перерисовывает прямоугольник: фон, попавшие в него клетки, голову, хвост и слои поверх поля"""
+        surface = self.surface
+        grid = snake.grid
+        size = grid.block_size
+        surface.set_clip(rect)
+        surface.blit(self.background, rect, rect)
+        
+        head = snake.body[0]
+        foods = grid.foods
+        first_col = max(rect.left // size, 0)
+        last_col = min((rect.right - 1) // size, grid.cols - 1)
+        first_row = max(rect.top // size, 0)
+        last_row = min((rect.bottom - 1) // size, grid.rows - 1)
+        for row in range(first_row, last_row + 1):
+            for col in range(first_col, last_col + 1):
+                cell = row * grid.cols + col
+                item = foods.get(cell)
+                if item is not None:
+                    item.draw(surface, self.food_color)
+                if grid.is_occupied(cell):
+                    pos = (col * size, row * size)
+                    if cell in grid.walls:
+                        self._draw_wall(pos, size)
+                    # Голова рисуется отдельно, в промежуточной позиции
+                    elif pos != head:
+                        snake.draw_segment(surface, self.snake_color, pos, False)
+        
+        for (pos, is_head), sprite_rect in zip(sprites, sprite_rects):
+            if rect.colliderect(sprite_rect):
+                snake.draw_segment(surface, self.snake_color, pos, is_head)
+        
+        for layer, layer_rect in self._layers:
+            if rect.colliderect(layer_rect):
+                surface.blit(layer, layer_rect)
+        surface.set_clip(None)
+
+class CameraRenderer(DirtyRenderer):
+    """Отрисовка поля больше окна: камера следует за головой змейки.
+    
+    Фон мира составлен из повторяющихся кусков размером с фоновую картинку,
+    и рисуются только куски, попавшие в окно; сегменты тела находятся по сетке
+    занятости в видимых клетках. Время кадра зависит от размера окна, а не от
+    размеров поля и длины змейки. Камера сдвигается каждый кадр, поэтому окно
+    перерисовывается целиком.
+    """
+    def __init__(self, surface, background, snake_color, food_color, outside_color=(0, 0, 0),
+                 wall_color=(90, 90, 90)):
+        super().__init__(surface, background, snake_color, food_color, dirty_rects=False, wall_color=wall_color)
+        # Цвет окна за краем поля, если поле меньше окна
+        self.outside_color = outside_color
+        # Левый верхний угол окна в координатах поля
+        self.camera = (0, 0)
+    
+    def render(self, snake, food, hud, alpha=1.0, hud_pos=(10, 10), overlay=None, overlay_pos=(10, 60)):
+        """Отрисовывает видимую часть поля; параметры те же, что у DirtyRenderer.render"""
+        surface = self.surface
+        size = snake.block_size
+        view_width, view_height = surface.get_size()
+        world_width = snake.grid.cols * size
+        world_height = snake.grid.rows * size
+        sprites = self._sprites(snake, alpha)
+        # Камера держит голову в центре окна, пока не упрётся в край поля
+        head = sprites[0][0]
+        left = self._follow(head[0] + size // 2, view_width, world_width)
+        top = self._follow(head[1] + size // 2, view_height, world_height)
+        self.camera = (left, top)
+        
+        self._draw_background(left, top, world_width, world_height)
+        self._draw_body(snake, left, top, view_width, view_height)
+        for item in snake.grid.foods.values():
+            item.draw(surface, self.food_color, (-left, -top))
+        for pos, is_head in sprites:
+            snake.draw_segment(surface, self.snake_color, (pos[0] - left, pos[1] - top), is_head)
+        
+        layers = [(hud, hud.get_rect(topleft=hud_pos))]
+        if overlay is not None:
+            layers.append((overlay, overlay.get_rect(topleft=overlay_pos)))
+        for layer, rect in layers:
+            surface.blit(layer, rect)
+        self._layers = layers
+        pygame.display.update()
+    
+    @staticmethod
+    def _follow(center, view, world):
+        """Координата края окна, при которой center посередине; поле меньше окна стоит по центру"""
+        if world <= view:
+            return (world - view) // 2
+        return min(max(center - view // 2, 0), world - view)
+    
+    def _draw_background(self, left, top, world_width, world_height):
+        """Рисует куски фона, пересекающие окно"""
+        surface = self.surface
+        view = surface.get_rect()
+        world = pygame.Rect(-left, -top, world_width, world_height)
+        if not world.contains(view):
+            surface.fill(self.outside_color)
+        visible = world.clip(view)
+        chunk_width, chunk_height = self.background.get_size()
+        surface.set_clip(visible)
+        for row in range((visible.top + top) // chunk_height, (visible.bottom - 1 + top) // chunk_height + 1):
+            for col in range((visible.left + left) // chunk_width, (visible.right - 1 + left) // chunk_width + 1):
+                surface.blit(self.background, (col * chunk_width - left, row * chunk_height - top))
+        surface.set_clip(None)
+    
+    def _draw_body(self, snake, left, top, view_width, view_height):
+        """Рисует стены и неподвижные сегменты в видимых клетках; пустые строки пропускаются целиком"""
+        surface = self.surface
+        grid = snake.grid
+        size = grid.block_size
+        counts = grid.counts
+        walls = grid.walls
+        head = snake.body[0]
+        first_col = max(left // size, 0)
+        last_col = min((left + view_width - 1) // size, grid.cols - 1)
+        first_row = max(top // size, 0)
+        last_row = min((top + view_height - 1) // size, grid.rows - 1)
+        width = last_col - first_col + 1
+        for row in range(first_row, last_row + 1):
+            start = row * grid.cols + first_col
+            row_counts = counts[start:start + width]
+            if row_counts.count(0) == width:
+                continue
+            y = row * size
+            for i, count in enumerate(row_counts):
+                if count:
+                    pos = ((first_col + i) * size, y)
+                    if start + i in walls:
+                        self._draw_wall((pos[0] - left, y - top), size)
+                    # Голова рисуется отдельно, в промежуточной позиции
+                    elif pos != head:
+                        snake.draw_segment(surface, self.snake_color, (pos[0] - left, y - top), False)
\ No newline at end of file
@@ -0,0 +1,299 @@
+import argparse
+from bisect import bisect_left, bisect_right
+from settings import Settings
+from engine import Engine
+
+# Формат файла повтора:
+#   MAGIC, версия, затем varint: уровень, зерно, ширина, высота, размер клетки
+#   и интервал снимков (Engine.keyframe_interval);
+#   далее записи varint (delta << 3) | код, где delta - тиков с прошлой записи,
+#   код 0-3 - поворот (DIRECTIONS), END - конец партии, после него varint счёта,
+#   KEYFRAME - снимок состояния на начало тика: varint длины и сам снимок
+#   (порядок свободных клеток в него не входит, Engine.restore строит его сам).
+#   После счёта идёт индекс снимков: varint числа снимков, пары varint
+#   (delta тика, delta смещения снимка в файле), и последние 4 байта файла -
+#   смещение начала индекса. Снимок заканчивается дополнительной едой: varint
+#   числа, затем для каждой varint клетки + 1 и varint тика исчезновения + 1
+#   (0 - еда постоянная)
+MAGIC = b"SNKR"
+VERSION = 1
+DIRECTIONS = ("UP", "DOWN", "LEFT", "RIGHT")
+END = 4
+KEYFRAME = 5
+# Смещение по клеткам поля для каждого кода направления
+_STEPS = ((0, -1), (0, 1), (-1, 0), (1, 0))
+
+_CODES = {direction: code for code, direction in enumerate(DIRECTIONS)}
+
+def write_varint(out, value):
+    """Дописывает в bytearray неотрицательное число по 7 бит в байте"""
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def read_varint(data, pos):
+    """Читает число, записанное write_varint; возвращает (число, новая позиция)"""
+    value = 0
+    shift = 0
+    while True:
+        if pos >= len(data):
+            raise ValueError("Файл повтора оборван")
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+def encode_snapshot(snapshot, cols, block_size):
+    """Кодирует Engine.snapshot(): тело - клеткой головы и 2 битами направления на сегмент"""
+    _, direction, body, food, rng_state, foods = snapshot
+    out = bytearray([_CODES[direction]])
+    write_varint(out, 0 if food is None else (food[1] // block_size) * cols + food[0] // block_size + 1)
+    write_varint(out, len(body))
+    write_varint(out, (body[0][1] // block_size) * cols + body[0][0] // block_size)
+    packed = 0
+    for i in range(1, len(body)):
+        step = ((body[i][0] - body[i - 1][0]) // block_size, (body[i][1] - body[i - 1][1]) // block_size)
+        packed |= _STEPS.index(step) << (2 * ((i - 1) % 4))
+        if i % 4 == 0 or i == len(body) - 1:
+            out.append(packed)
+            packed = 0
+    # Состояние Mersenne Twister: версия, 625 слов по 32 бита, gauss_next не используется
+    version, words, _ = rng_state
+    out.append(version)
+    for word in words:
+        out += word.to_bytes(4, "little")
+    write_varint(out, len(foods))
+    for position, expires_at in foods:
+        write_varint(out, 0 if position is None else
+                     (position[1] // block_size) * cols + position[0] // block_size + 1)
+        write_varint(out, 0 if expires_at is None else expires_at + 1)
+    return out
+
+def decode_snapshot(data, pos, tick, cols, block_size):
+    """Разбирает снимок, записанный encode_snapshot, в формат Engine.snapshot()"""
+    direction = DIRECTIONS[data[pos]]
+    food, pos = read_varint(data, pos + 1)
+    food = None if food == 0 else ((food - 1) % cols * block_size, (food - 1) // cols * block_size)
+    length, pos = read_varint(data, pos)
+    head, pos = read_varint(data, pos)
+    x, y = head % cols, head // cols
+    body = [(x * block_size, y * block_size)]
+    for i in range(1, length):
+        dx, dy = _STEPS[(data[pos + (i - 1) // 4] >> (2 * ((i - 1) % 4))) & 3]
+        x += dx
+        y += dy
+        body.append((x * block_size, y * block_size))
+    pos += (length + 2) // 4
+    rng_version = data[pos]
+    pos += 1
+    words = tuple(int.from_bytes(data[pos + 4 * i:pos + 4 * i + 4], "little") for i in range(625))
+    pos += 4 * 625
+    foods = []
+    count, pos = read_varint(data, pos)
+    for _ in range(count):
+        cell, pos = read_varint(data, pos)
+        expires_at, pos = read_varint(data, pos)
+        position = None if cell == 0 else ((cell - 1) % cols * block_size, (cell - 1) // cols * block_size)
+        foods.append((position, None if expires_at == 0 else expires_at - 1))
+    return (tick, direction, body, food, (rng_version, words, None), foods)
+
+class ReplayWriter:
+    """Запись партии в файл по мере игры; подключается к Engine как recorder"""
+    def __init__(self, path, level, seed, dis_width=Settings.DIS_WIDTH,
+                 dis_height=Settings.DIS_HEIGHT, block_size=Settings.BLOCK_SIZE, buffer_size=4096,
+                 keyframe_interval=Settings.REPLAY_KEYFRAME_INTERVAL):
+        self.path = path
+        self.buffer_size = buffer_size
+        # Engine.keyframe_interval записываемой партии
+        self.keyframe_interval = keyframe_interval
+        self.cols = dis_width // block_size
+        self.block_size = block_size
+        self._file = open(path, "wb")
+        self._buffer = bytearray(MAGIC)
+        self._buffer.append(VERSION)
+        # Интервал снимков записывается вместе с полем: на его тиках Engine
+        # перестраивает индекс свободных клеток, и от этого зависит место еды
+        for value in (level, seed, dis_width, dis_height, block_size, keyframe_interval):
+            write_varint(self._buffer, value)
+        self._last_tick = 0
+        # Уже записанные в файл байты и индекс снимков [(тик, смещение)]
+        self._written = 0
+        self._index = []
+    
+    def turn(self, tick, direction):
+        """Записывает поворот, применённый на тике tick"""
+        write_varint(self._buffer, (tick - self._last_tick) << 3 | _CODES[direction])
+        self._last_tick = tick
+        # Файл пишется пачками, а не на каждый поворот
+        if len(self._buffer) >= self.buffer_size:
+            self._flush()
+    
+    def keyframe(self, engine):
+        """Записывает снимок состояния партии на начало текущего тика"""
+        if engine.keyframe_interval != self.keyframe_interval:
+            raise ValueError("Интервал снимков повтора не совпадает с Engine.keyframe_interval")
+        snapshot = engine.snapshot()
+        tick = snapshot[0]
+        payload = encode_snapshot(snapshot, self.cols, self.block_size)
+        write_varint(self._buffer, (tick - self._last_tick) << 3 | KEYFRAME)
+        write_varint(self._buffer, len(payload))
+        self._last_tick = tick
+        self._index.append((tick, self._written + len(self._buffer)))
+        self._buffer += payload
+        if len(self._buffer) >= self.buffer_size:
+            self._flush()
+    
+    def close(self, ticks, score):
+        """Записывает число тиков, счёт партии и индекс снимков и закрывает файл"""
+        if self._file is None:
+            return
+        write_varint(self._buffer, (ticks - self._last_tick) << 3 | END)
+        write_varint(self._buffer, score)
+        index_offset = self._written + len(self._buffer)
+        write_varint(self._buffer, len(self._index))
+        last_tick = last_offset = 0
+        for tick, offset in self._index:
+            write_varint(self._buffer, tick - last_tick)
+            write_varint(self._buffer, offset - last_offset)
+            last_tick, last_offset = tick, offset
+        self._buffer += index_offset.to_bytes(4, "little")
+        self._flush()
+        self._file.close()
+        self._file = None
+    
+    def _flush(self):
+        self._file.write(self._buffer)
+        self._written += len(self._buffer)
+        self._buffer.clear()
+
+class Replay:
+    """Прочитанный повтор: параметры партии, повороты [(тик, направление)], число тиков и счёт.
+    
+    Снимки состояния из индекса позволяют перейти к любому тику, проиграв
+    не больше одного интервала между снимками.
+    """
+    def __init__(self, level, seed, dis_width, dis_height, block_size, turns, ticks, score,
+                 keyframe_interval=Settings.REPLAY_KEYFRAME_INTERVAL, data=b"", keyframes=()):
+        self.level = level
+        self.seed = seed
+        self.dis_width = dis_width
+        self.dis_height = dis_height
+        self.block_size = block_size
+        self.keyframe_interval = keyframe_interval
+        self.turns = turns
+        self.ticks = ticks
+        self.score = score
+        # Содержимое файла и [(тик, смещение снимка)] из индекса
+        self.data = data
+        self.keyframes = list(keyframes)
+        self._turn_ticks = [tick for tick, _ in turns]
+        self._keyframe_ticks = [tick for tick, _ in self.keyframes]
+    
+    @classmethod
+    def load(cls, path):
+        """Читает повтор из файла"""
+        with open(path, "rb") as f:
+            return cls.decode(f.read())
+    
+    @classmethod
+    def decode(cls, data):
+        """Разбирает содержимое файла повтора"""
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError("Это не файл повтора")
+        version = data[len(MAGIC)]
+        if version != VERSION:
+            raise ValueError(f"Неизвестная версия повтора: {version}")
+        pos = len(MAGIC) + 1
+        header = []
+        for _ in range(6):
+            value, pos = read_varint(data, pos)
+            header.append(value)
+        
+        turns = []
+        tick = 0
+        while True:
+            record, pos = read_varint(data, pos)
+            tick += record >> 3
+            code = record & 7
+            if code == END:
+                score, pos = read_varint(data, pos)
+                level, seed, dis_width, dis_height, block_size, keyframe_interval = header
+                return cls(level, seed, dis_width, dis_height, block_size, turns, tick, score,
+                           keyframe_interval, data, cls._read_index(data))
+            if code == KEYFRAME:
+                # Снимки находятся по индексу, здесь они пропускаются
+                length, pos = read_varint(data, pos)
+                pos += length
+                continue
+            if code >= len(DIRECTIONS):
+                raise ValueError(f"Неизвестная запись повтора: {code}")
+            turns.append((tick, DIRECTIONS[code]))
+    
+    @staticmethod
+    def _read_index(data):
+        """Читает индекс снимков с конца файла"""
+        pos = int.from_bytes(data[-4:], "little")
+        count, pos = read_varint(data, pos)
+        keyframes = []
+        tick = offset = 0
+        for _ in range(count):
+            delta, pos = read_varint(data, pos)
+            tick += delta
+            delta, pos = read_varint(data, pos)
+            offset += delta
+            keyframes.append((tick, offset))
+        return keyframes
+    
+    def new_engine(self):
+        """Возвращает Engine в начале записанной партии"""
+        return Engine(self.level, self.seed, self.dis_width, self.dis_height, self.block_size,
+                      self.keyframe_interval)
+    
+    def simulate(self):
+        """Заново проигрывает партию без отрисовки и задержек; возвращает Engine в конечном состоянии"""
+        # Снимкам не доверяем: проверка всегда идёт с первого тика
+        return self.advance(self.new_engine(), self.ticks)
+    
+    def advance(self, engine, tick):
+        """Продвигает engine до тика tick (не дальше конца партии), применяя записанные повороты"""
+        state = engine.state
+        tick = min(tick, self.ticks)
+        i = bisect_left(self._turn_ticks, state.tick)
+        while state.tick < tick and not state.over:
+            action = None
+            if i < len(self.turns) and self.turns[i][0] == state.tick:
+                action = self.turns[i][1]
+                i += 1
+            engine.step(action)
+        return engine
+    
+    def seek(self, tick, engine=None):
+        """Возвращает Engine на тике tick; engine переиспользуется, если он ближе ближайшего снимка"""
+        tick = max(0, min(tick, self.ticks))
+        i = bisect_right(self._keyframe_ticks, tick) - 1
+        start = self._keyframe_ticks[i] if i >= 0 else 0
+        if engine is None or not start <= engine.state.tick <= tick:
+            engine = self.new_engine()
+            if i >= 0:
+                snapshot = decode_snapshot(self.data, self.keyframes[i][1], start,
+                                           self.dis_width // self.block_size, self.block_size)
+                engine.restore(snapshot)
+        return self.advance(engine, tick)
+    
+    def verify(self):
+        """Проверяет, что партия действительно заканчивается записанным счётом на записанном тике"""
+        state = self.simulate().state
+        return state.tick == self.ticks and state.score == self.score
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Проверка повторов партий")
+    parser.add_argument("paths", nargs="+", help="файлы повторов")
+    args = parser.parse_args()
+    
+    for path in args.paths:
+        replay = Replay.load(path)
+        result = "подтверждён" if replay.verify() else "НЕ СОВПАДАЕТ"
+        print(f"{path}: уровень {replay.level}, счёт {replay.score}, тиков {replay.ticks} - {result}")
\ No newline at end of file
@@ -1,6 +1,6 @@
-import pygame
 import json
 import os
+from levels import load_levels
 
 class Settings:
     # Цвета
@@ -10,22 +10,53 @@ class Settings:
     GREEN = (0, 255, 0)
     BLUE = (50, 153, 213)
     GOLD = (255, 215, 0)
+    GRAY = (90, 90, 90)
     
     # Размеры
     DIS_WIDTH = 800
     DIS_HEIGHT = 600
     BLOCK_SIZE = 20
+    # Размер поля в клетках (cols, rows); None - поле по размеру окна.
+    # Поле другого размера показывается камерой: большее следует за головой
+    # змейки, меньшее стоит по центру окна
+    WORLD_SIZE = None
+    
+    # Отрисовка только изменившихся областей экрана вместо полного кадра
+    DIRTY_RECTS = True
+    
+    # Частота отрисовки и опроса ввода; скорость змейки задаётся уровнем
+    RENDER_FPS = 60
+    # Плавное движение головы и хвоста между клетками
+    INTERPOLATION = True
+    # Предел времени кадра, мс: после зависания змейка не делает серию ходов подряд
+    MAX_FRAME_MS = 250
+    
+    # Замеры кадра (F3 - оверлей на экране): число хранимых кадров, частота
+    # обновления оверлея, мс, и интервал выгрузки сводок с --profile-frames, с
+    PROFILE_FRAMES = 600
+    PROFILE_OVERLAY_MS = 250
+    PROFILE_EXPORT_INTERVAL = 1.0
+    PROFILE_FONT = "couriernew"
+    
+    # Максимальное ожидание события в меню, мс: меню не перерисовывается без ввода
+    MENU_WAIT_MS = 500
+    # Через сколько мс бездействия в меню автопилот начинает демонстрационную игру (0 - никогда)
+    ATTRACT_IDLE_MS = 30000
     
     # Шрифты
     FONT_STYLE = "bahnschrift"
     SCORE_FONT = "comicsansms"
     
-    # Уровни сложности
-    LEVELS = {
-        1: {"speed": 10, "name": "Лёгкий", "goal": 5},
-        2: {"speed": 15, "name": "Средний", "goal": 10},
-        3: {"speed": 20, "name": "Тяжёлый", "goal": 15}
-    }
+    # Уровни сложности: скорость, цель, стены и еда; читаются из assets/levels.json
+    LEVELS = load_levels()
+    
+    # Формат микшера: частота и разрядность совпадают со всеми звуковыми файлами
+    # игры (44,1 кГц, 16 бит). Стерео нужно для crash.wav; моно eat.wav и
+    # background.wav при загрузке и воспроизведении дублируются в оба канала
+    MIXER_FREQUENCY = 44100
+    MIXER_SIZE = -16
+    MIXER_CHANNELS = 2
+    MIXER_BUFFER = 512
     
     # Звуковые файлы
     SOUND_FILES = {
@@ -34,8 +65,21 @@ class Settings:
         'crash': 'assets/sounds/crash.wav'
     }
     
+    # База рекордов и прогресса; прежние records.json и progress.json переносятся в неё
+    RECORDS_DB = "records.db"
+    
+    # Запись повторов партий: зерно, уровень и повороты по тикам
+    RECORD_REPLAYS = True
+    REPLAY_DIR = "replays"
+    # Интервал снимков состояния в повторе, тики: перемотка проигрывает не больше интервала
+    REPLAY_KEYFRAME_INTERVAL = 1000
+    # Шаг перемотки клавишами PageUp/PageDown в просмотре повтора, тики
+    REPLAY_SCRUB_TICKS = 500
+    
     @staticmethod
     def ensure_directories_exist():
         """Создает необходимые директории, если они не существуют"""
         if not os.path.exists('assets/sounds'):
             os.makedirs('assets/sounds')
+        if Settings.RECORD_REPLAYS and not os.path.exists(Settings.REPLAY_DIR):
+            os.makedirs(Settings.REPLAY_DIR)
\ No newline at end of file
@@ -1,79 +1,272 @@
-import pygame
+from array import array
+from collections import deque
+from grid import Grid
+
+class SnakeBody:
+    """Тело змейки как последовательность позиций сегментов в пикселях от головы к хвосту.
+    
+    Позиции вычисляются по кольцу индексов клеток змейки при обращении и
+    нигде не хранятся.
+    """
+    __slots__ = ("_snake",)
+    
+    def __init__(self, snake):
+        self._snake = snake
+    
+    def __len__(self):
+        return self._snake.length
+    
+    def __getitem__(self, index):
+        snake = self._snake
+        if isinstance(index, slice):
+            # Срез - список позиций, как у среза списка
+            ring = snake._ring
+            pos_of = snake.grid.pos_of
+            end = snake._start + snake.length - 1
+            capacity = len(ring)
+            return [pos_of(ring[(end - i) % capacity]) for i in range(*index.indices(snake.length))]
+        if index == 0:
+            return snake.head
+        if index < 0:
+            index += snake.length
+        if not 0 <= index < snake.length:
+            raise IndexError("Нет такого сегмента змейки")
+        ring = snake._ring
+        return snake.grid.pos_of(ring[(snake._start + snake.length - 1 - index) % len(ring)])
+    
+    def __iter__(self):
+        snake = self._snake
+        ring = snake._ring
+        pos_of = snake.grid.pos_of
+        end = snake._start + snake.length - 1
+        capacity = len(ring)
+        for i in range(end, end - snake.length, -1):
+            yield pos_of(ring[i % capacity])
+    
+    def __repr__(self):
+        return f"SnakeBody({list(self)})"
 
 class Snake:
-    def __init__(self, dis_width, dis_height, block_size, head_texture=None, body_texture=None):
+    # Угол поворота текстуры головы для каждого направления
+    HEAD_ANGLES = {"RIGHT": 0, "UP": 90, "DOWN": 270, "LEFT": 180}
+    OPPOSITE_DIRECTIONS = {
+        "UP": "DOWN",
+        "DOWN": "UP",
+        "LEFT": "RIGHT",
+        "RIGHT": "LEFT"
+    }
+    # Сколько нажатий может ждать своего хода; лишние отбрасываются
+    INPUT_QUEUE_SIZE = 3
+    # Начальная ёмкость кольца сегментов; при заполнении она удваивается
+    INITIAL_CAPACITY = 16
+    
+    __slots__ = (
+        "block_size", "dis_width", "dis_height", "head_texture", "body_texture", "head_rotations", "grid",
+        "_ring", "_start", "length", "body", "head", "head_cell", "self_collision", "wall_collision",
+        "removed_tail", "direction", "last_direction", "input_queue", "moves", "input_latency_total",
+        "input_latency_count", "input_latency_max", "dropped_inputs"
+    )
+    
+    def __init__(self, dis_width, dis_height, block_size, head_texture=None, body_texture=None, grid=None):
         self.block_size = block_size
         self.dis_width = dis_width
         self.dis_height = dis_height
         self.head_texture = head_texture
         self.body_texture = body_texture
+        # Повёрнутые варианты текстуры головы: {направление: поверхность}
+        self.head_rotations = None
+        # Сетка занятости, общая с едой
+        if grid is None:
+            grid = Grid(dis_width // block_size, dis_height // block_size, block_size)
+        self.grid = grid
+        # Тело - кольцо индексов клеток сетки по 4 байта на сегмент: сегменты
+        # от хвоста (_start) к голове, length штук
+        self._ring = array('I', bytes(4 * self.INITIAL_CAPACITY))
+        self._start = 0
+        self.length = 0
+        # Позиции сегментов в пикселях от головы к хвосту
+        self.body = SnakeBody(self)
+        self.input_queue = deque()
         self.reset()
     
     def reset(self):
-        x = round(self.dis_width / 2 / self.block_size) * self.block_size
-        y = round(self.dis_height / 2 / self.block_size) * self.block_size
-        self.body = [(x, y)]
-        self.direction = "RIGHT"
-        self.last_direction = "RIGHT"
+        col = round(self.dis_width / 2 / self.block_size)
+        row = round(self.dis_height / 2 / self.block_size)
+        self.restore_cells(array('I', [row * self.grid.cols + col]), "RIGHT")
+        self.moves = 0
+        # Задержка от нажатия до хода, в ходах
+        self.input_latency_total = 0
+        self.input_latency_count = 0
+        self.input_latency_max = 0
+        self.dropped_inputs = 0
+    
+    def restore(self, body, direction):
+        """Ставит змейку в заданное положение, например из снимка состояния; body - позиции от головы"""
+        cells = array('I', [self.grid.cell_of(segment) for segment in body])
+        cells.reverse()
+        self.restore_cells(cells, direction)
+    
+    def restore_cells(self, cells, direction, occupy=True):
+        """Ставит змейку по индексам клеток от хвоста к голове; occupy=False - клетки
+        уже отмечены в сетке, например восстановленной из сохранения"""
+        if occupy:
+            # Освобождение клеток прежнего тела
+            for cell in self.cells():
+                self.grid.release(cell)
+        capacity = self.INITIAL_CAPACITY
+        while capacity < len(cells):
+            capacity *= 2
+        self._ring = array('I', bytes(4 * capacity))
+        self._ring[:len(cells)] = array('I', cells)
+        self._start = 0
+        self.length = len(cells)
+        # Клетка головы и её позиция в пикселях
+        self.head_cell = cells[-1]
+        self.head = self.grid.pos_of(self.head_cell)
+        if occupy:
+            for cell in cells:
+                self.grid.occupy(cell)
+        self.self_collision = False
+        self.wall_collision = False
+        # Клетка, освобождённая хвостом на последнем ходу (None, если змейка выросла)
+        self.removed_tail = None
+        self.direction = direction
+        self.last_direction = direction
+        # Очередь поворотов: (направление, номер хода на момент нажатия)
+        self.input_queue.clear()
+    
+    def cells(self):
+        """Индексы клеток тела от хвоста к голове (копия)"""
+        ring = self._ring
+        end = self._start + self.length
+        if end <= len(ring):
+            return ring[self._start:end]
+        return ring[self._start:] + ring[:end - len(ring)]
+    
+    @property
+    def tail_cell(self):
+        return self._ring[self._start]
+    
+    def is_occupied(self, pos):
+        """Проверяет, занята ли клетка телом змейки"""
+        cell = self.grid.cell_of(pos)
+        return cell is not None and self.grid.is_occupied(cell)
     
     def change_direction(self, new_direction):
-        opposite_directions = {
-            "UP": "DOWN",
-            "DOWN": "UP",
-            "LEFT": "RIGHT",
-            "RIGHT": "LEFT"
-        }
-        if new_direction != opposite_directions.get(self.last_direction):
-            self.direction = new_direction
+        """Ставит поворот в очередь: за ход применяется один поворот в порядке нажатия"""
+        last = self.input_queue[-1][0] if self.input_queue else self.direction
+        if new_direction == last:
+            return
+        if len(self.input_queue) >= self.INPUT_QUEUE_SIZE:
+            self.dropped_inputs += 1
+            return
+        self.input_queue.append((new_direction, self.moves))
+    
+    def _apply_queued_direction(self):
+        """Применяет первый допустимый поворот из очереди"""
+        while self.input_queue:
+            direction, pressed_at = self.input_queue.popleft()
+            if direction != self.OPPOSITE_DIRECTIONS.get(self.last_direction):
+                self.direction = direction
+                latency = self.moves - pressed_at
+                self.input_latency_total += latency
+                self.input_latency_count += 1
+                self.input_latency_max = max(self.input_latency_max, latency)
+                return
+            self.dropped_inputs += 1
+    
+    @property
+    def mean_input_latency(self):
+        """Средняя задержка от нажатия до поворота, в ходах"""
+        if not self.input_latency_count:
+            return 0.0
+        return self.input_latency_total / self.input_latency_count
     
     def move(self, food_pos):
-        x, y = self.body[0]
+        self._apply_queued_direction()
+        self.moves += 1
+        grid = self.grid
+        cols = grid.cols
+        size = self.block_size
+        row, col = divmod(self.head_cell, cols)
         
         if self.direction == "UP":
-            y -= self.block_size
+            row -= 1
         elif self.direction == "DOWN":
-            y += self.block_size
+            row += 1
         elif self.direction == "LEFT":
-            x -= self.block_size
+            col -= 1
         elif self.direction == "RIGHT":
-            x += self.block_size
+            col += 1
         
         self.last_direction = self.direction
-        
-        if (x, y) == food_pos:
-            self.body.insert(0, (x, y))
-            return True
-        else:
-            self.body.insert(0, (x, y))
-            self.body.pop()
+        self.removed_tail = None
+        # Голова за краем поля: змейка остаётся на месте, ход заканчивается поражением
+        if not (0 <= col < cols and 0 <= row < grid.rows):
+            self.wall_collision = True
             return False
+        
+        head = (col * size, row * size)
+        cell = row * cols + col
+        # Еда в клетке: food_pos или любая еда, отмеченная в сетке
+        ate = head == food_pos or cell in grid.foods
+        ring = self._ring
+        capacity = len(ring)
+        if not ate:
+            # Хвост освобождает клетку до того, как в неё может войти голова
+            tail = ring[self._start]
+            self._start = (self._start + 1) % capacity
+            self.length -= 1
+            grid.release(tail)
+            tail_row, tail_col = divmod(tail, cols)
+            self.removed_tail = (tail_col * size, tail_row * size)
+        # Клетка уже занята телом или стеной
+        self.self_collision = grid.occupy(cell)
+        if self.length == capacity:
+            self._grow()
+            ring = self._ring
+            capacity = len(ring)
+        ring[(self._start + self.length) % capacity] = cell
+        self.length += 1
+        self.head_cell = cell
+        self.head = head
+        return ate
+    
+    def _grow(self):
+        """Удваивает ёмкость кольца, выкладывая сегменты с начала"""
+        cells = self.cells()
+        self._ring = cells + array('I', bytes(4 * len(self._ring)))
+        self._start = 0
     
     def check_collision(self):
-        head = self.body[0]
-        if (head[0] >= self.dis_width or head[0] < 0 or
-            head[1] >= self.dis_height or head[1] < 0):
-            return True
-        if head in self.body[1:]:
-            return True
-        return False
+        return self.wall_collision or self.self_collision
     
     def draw(self, surface, color):
         for i, segment in enumerate(self.body):
-            if i == 0:  # Голова
-                if self.head_texture:
-                    angle = 0
-                    if self.direction == "UP":
-                        angle = 90
-                    elif self.direction == "DOWN":
-                        angle = 270
-                    elif self.direction == "LEFT":
-                        angle = 180
-                    rotated_head = pygame.transform.rotate(self.head_texture, angle)
-                    surface.blit(rotated_head, segment)
-                else:
-                    pygame.draw.rect(surface, color, [segment[0], segment[1], self.block_size, self.block_size])
-            else:  # Тело
-                if self.body_texture:
-                    surface.blit(self.body_texture, segment)
-                else:
-                    pygame.draw.rect(surface, color, [segment[0], segment[1], self.block_size, self.block_size])
\ No newline at end of file
+            self.draw_segment(surface, color, segment, i == 0)
+    
+    def draw_segment(self, surface, color, segment, is_head):
+        """Рисует один сегмент змейки в указанной позиции"""
+        # pygame нужен только для отрисовки: игровая логика работает без него
+        import pygame
+        
+        if is_head:  # Голова
+            if self.head_texture:
+                surface.blit(self._rotated_head(), segment)
+            else:
+                pygame.draw.rect(surface, color, [segment[0], segment[1], self.block_size, self.block_size])
+        else:  # Тело
+            if self.body_texture:
+                surface.blit(self.body_texture, segment)
+            else:
+                pygame.draw.rect(surface, color, [segment[0], segment[1], self.block_size, self.block_size])
+    
+    def _rotated_head(self):
+        """Возвращает текстуру головы по направлению движения; повороты считаются один раз"""
+        if self.head_rotations is None:
+            import pygame
+            self.head_rotations = {
+                direction: pygame.transform.rotate(self.head_texture, angle)
+                for direction, angle in self.HEAD_ANGLES.items()
+            }
+        return self.head_rotations[self.direction]
\ No newline at end of file
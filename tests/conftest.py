@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Модули игры лежат в корне репозитория
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
\ No newline at end of file
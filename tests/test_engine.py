@@ -0,0 +1,61 @@
+import pytest
+from autopilot import Autopilot
+from engine import Engine
+from grid import Grid
+from settings import Settings
+
+BLOCK = 20
+COLS, ROWS = 16, 12
+INTERVAL = 25
+
+def _view(state):
+    return (state.snake.head, state.snake.direction, tuple(food.position for food in state.foods),
+            state.score, state.tick, state.over)
+
+def _engine(level, seed):
+    engine = Engine(level, seed, COLS * BLOCK, ROWS * BLOCK, BLOCK, INTERVAL)
+    return engine, Autopilot(COLS, ROWS, engine.state.grid.walls)
+
+def _play(engine, autopilot, ticks):
+    """Ведёт партию автопилотом ticks тиков"""
+    for _ in range(ticks):
+        engine.step(autopilot.decide(engine.state))
+
+@pytest.fixture(params=[1, 5])
+def level(request, monkeypatch):
+    monkeypatch.setitem(Settings.LEVELS[request.param], "goal", 10 ** 9)
+    return request.param
+
+@pytest.mark.parametrize("indexed", [True, False])
+def test_save_load_continues_game(monkeypatch, level, indexed):
+    """Загруженная партия продолжается так же, как исходная, с индексом свободных клеток и без него"""
+    if not indexed:
+        # Поле больше предела, занятое меньше чем наполовину, остаётся без индекса
+        monkeypatch.setattr(Grid, "INDEX_LIMIT", 64)
+    engine, autopilot = _engine(level, seed=5)
+    _play(engine, autopilot, 2 * INTERVAL + 7)
+    assert (engine.state.grid.free is not None) == indexed
+    data = engine.save()
+    
+    loaded = Engine.load(data)
+    assert loaded.save() == data
+    assert _view(loaded.state) == _view(engine.state)
+    assert (loaded.state.grid.free is not None) == indexed
+    # Продолжение пересекает несколько тиков перестройки индекса
+    for _ in range(3 * INTERVAL):
+        action = autopilot.decide(engine.state)
+        engine.step(action)
+        loaded.step(action)
+        assert _view(loaded.state) == _view(engine.state)
+    assert not engine.state.over
+    assert loaded.save() == engine.save()
+
+def test_load_rejects_bad_data():
+    """Чужие и оборванные данные не загружаются"""
+    engine, autopilot = _engine(1, seed=2)
+    _play(engine, autopilot, 10)
+    data = engine.save()
+    with pytest.raises(ValueError):
+        Engine.load(b"not a save" + data)
+    with pytest.raises(ValueError):
+        Engine.load(data[:-8])
\ No newline at end of file
@@ -0,0 +1,86 @@
+import random
+from grid import Grid
+
+COLS, ROWS = 12, 10
+
+class CountingRandom(random.Random):
+    """Генератор, который считает вызовы randrange"""
+    def __init__(self, seed):
+        super().__init__(seed)
+        self.calls = 0
+    
+    def randrange(self, *args):
+        self.calls += 1
+        return super().randrange(*args)
+
+def _grid(occupied):
+    grid = Grid(COLS, ROWS, 20)
+    for cell in occupied:
+        grid.occupy(cell)
+    return grid
+
+def _frequencies(grid, rng, draws):
+    counts = {}
+    for _ in range(draws):
+        cell = grid.random_free(rng)
+        counts[cell] = counts.get(cell, 0) + 1
+    return counts
+
+def _assert_uniform(counts, free, draws):
+    """Каждая свободная клетка выпадает, и ни одна не выпадает заметно чаще других"""
+    assert set(counts) == free
+    expected = draws / len(free)
+    chi2 = sum((count - expected) ** 2 / expected for count in counts.values())
+    # Для len(free) - 1 степеней свободы такое значение практически недостижимо при равномерном выборе
+    assert chi2 < 2 * len(free)
+
+def test_random_free_is_uniform_and_one_draw():
+    """С индексом выбор равномерен по свободным клеткам и стоит ровно одного вызова генератора"""
+    occupied = set(range(0, COLS * ROWS, 3))
+    grid = _grid(occupied)
+    free = set(range(grid.size)) - occupied
+    rng = CountingRandom(1)
+    draws = 200 * len(free)
+    counts = _frequencies(grid, rng, draws)
+    assert rng.calls == draws
+    _assert_uniform(counts, free, draws)
+
+def test_random_free_without_index_is_uniform(monkeypatch):
+    """Большое поле без индекса выбирает так же равномерно, а индекс появляется после половины поля"""
+    monkeypatch.setattr(Grid, "INDEX_LIMIT", 16)
+    occupied = set(range(0, COLS * ROWS, 4))
+    grid = _grid(occupied)
+    assert grid.free is None
+    free = set(range(grid.size)) - occupied
+    draws = 200 * len(free)
+    _assert_uniform(_frequencies(grid, random.Random(2), draws), free, draws)
+    
+    for cell in sorted(free)[:len(free) // 2 + 1]:
+        grid.occupy(cell)
+    assert grid.random_free(random.Random(3)) is not None
+    assert grid.free is not None
+
+def test_random_empty_skips_food():
+    """Еда не ставится в клетку другой еды, а на поле без мест возвращается None"""
+    grid = _grid(range(COLS * ROWS - 3))
+    last = set(range(COLS * ROWS - 3, COLS * ROWS))
+    grid.foods = {cell: None for cell in sorted(last)[:2]}
+    rng = random.Random(4)
+    for _ in range(50):
+        assert grid.random_empty(rng) == max(last)
+    grid.foods[max(last)] = None
+    assert grid.random_empty(rng) is None
+
+def test_rebuild_index_depends_only_on_occupancy():
+    """Одна и та же занятость, полученная разными ходами, даёт один порядок свободных клеток"""
+    cells = list(range(0, COLS * ROWS, 5))
+    first = _grid(cells)
+    second = _grid(reversed(cells + [7, 8]))
+    second.release(7)
+    second.release(8)
+    assert first.free != second.free
+    first.rebuild_index()
+    second.rebuild_index()
+    assert first.free == second.free
+    assert first.slot == second.slot
+    assert first.free_count == second.free_count == first.size - len(cells)
\ No newline at end of file
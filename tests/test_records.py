@@ -0,0 +1,59 @@
+import multiprocessing
+import os
+import sqlite3
+from records import RecordStore
+
+WRITERS = 6
+SCORES_PER_WRITER = 40
+LEVELS = (1, 2, 3)
+
+def _score(writer, i):
+    """Счёт без повторов: результаты разных процессов перемежаются в таблице"""
+    return i * WRITERS + writer
+
+def _write_scores(path, writer, start):
+    """Процесс-писатель: открывает общую базу и добавляет результаты на всех уровнях"""
+    store = RecordStore(path, legacy_records=os.devnull, legacy_progress=os.devnull)
+    start.wait()
+    for i in range(SCORES_PER_WRITER):
+        store.add(LEVELS[i % len(LEVELS)], _score(writer, i), f"w{writer}-{i}")
+        if i % 7 == 0:
+            # Часть результатов пишется отдельными транзакциями
+            store.flush()
+    store.close()
+
+def test_concurrent_writers(tmp_path):
+    """Несколько процессов пишут в одну базу одновременно: ни один результат не теряется"""
+    path = str(tmp_path / "records.db")
+    observer = RecordStore(path, legacy_records=os.devnull, legacy_progress=os.devnull)
+    for level in LEVELS:
+        assert observer.top(level) == []
+    
+    context = multiprocessing.get_context("spawn")
+    start = context.Event()
+    writers = [context.Process(target=_write_scores, args=(path, writer, start)) for writer in range(WRITERS)]
+    for process in writers:
+        process.start()
+    start.set()
+    for process in writers:
+        process.join(60)
+        assert process.exitcode == 0
+    
+    expected = {level: [] for level in LEVELS}
+    for writer in range(WRITERS):
+        for i in range(SCORES_PER_WRITER):
+            expected[LEVELS[i % len(LEVELS)]].append((f"w{writer}-{i}", _score(writer, i)))
+    
+    with sqlite3.connect(path) as db:
+        assert db.execute("SELECT COUNT(*) FROM scores").fetchone()[0] == WRITERS * SCORES_PER_WRITER
+        rows = db.execute("SELECT level, name, score FROM scores").fetchall()
+    assert sorted(rows) == sorted((level, name, score) for level, entries in expected.items()
+                                  for name, score in entries)
+    
+    # Открытая до записи игра видит чужие результаты после refresh()
+    observer.refresh()
+    for level, entries in expected.items():
+        top = sorted(entries, key=lambda entry: -entry[1])[:RecordStore.TOP_SIZE]
+        assert observer.top(level) == top
+        assert observer.best(level) == top[0][1]
+    observer.close()
\ No newline at end of file
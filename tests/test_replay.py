@@ -0,0 +1,71 @@
+import random
+import pytest
+from autopilot import Autopilot
+from engine import Engine
+from replay import Replay, ReplayWriter
+from settings import Settings
+
+BLOCK = 20
+INTERVAL = 25
+MAX_TICKS = 1500
+
+def _view(state):
+    """То, что видно на тике: голова, еда и счёт"""
+    return (state.snake.head, tuple(food.position for food in state.foods), state.score)
+
+def _play(path, level, seed, cols=16, rows=12):
+    """Играет автопилотом с редкими случайными поворотами и пишет повтор; возвращает {тик: вид}"""
+    engine = Engine(level, seed, cols * BLOCK, rows * BLOCK, BLOCK, INTERVAL)
+    writer = ReplayWriter(path, level, seed, cols * BLOCK, rows * BLOCK, BLOCK, keyframe_interval=INTERVAL)
+    engine.recorder = writer
+    autopilot = Autopilot(cols, rows, engine.state.grid.walls)
+    rng = random.Random(seed)
+    views = {0: _view(engine.state)}
+    while not engine.state.over and engine.state.tick < MAX_TICKS:
+        if rng.random() < 0.005:
+            engine.state.snake.change_direction(rng.choice(("UP", "DOWN", "LEFT", "RIGHT")))
+        else:
+            autopilot.control(engine.state)
+        state, _ = engine.step()
+        views[state.tick] = _view(state)
+    writer.close(engine.state.tick, engine.state.score)
+    return engine, views
+
+@pytest.fixture(params=[1, 5])
+def level(request, monkeypatch):
+    # Недостижимая цель: партия идёт до проигрыша или MAX_TICKS
+    monkeypatch.setitem(Settings.LEVELS[request.param], "goal", 10 ** 9)
+    return request.param
+
+def test_round_trip(tmp_path, level):
+    """Повтор хранит параметры партии, и проигрывание заканчивается записанным счётом"""
+    path = str(tmp_path / "game.snkr")
+    engine, _ = _play(path, level, seed=7)
+    replay = Replay.load(path)
+    assert (replay.level, replay.seed, replay.keyframe_interval) == (level, 7, INTERVAL)
+    assert (replay.ticks, replay.score) == (engine.state.tick, engine.state.score)
+    assert len(replay.keyframes) == (engine.state.tick - 1) // INTERVAL
+    assert replay.verify()
+
+def test_simulate_is_deterministic(tmp_path, level):
+    """Проигрывание с первого тика повторяет каждый тик исходной партии"""
+    path = str(tmp_path / "game.snkr")
+    _, views = _play(path, level, seed=11)
+    replay = Replay.load(path)
+    engine = replay.new_engine()
+    for tick in range(1, replay.ticks + 1):
+        replay.advance(engine, tick)
+        assert _view(engine.state) == views[tick]
+
+def test_seek(tmp_path, level):
+    """Переход к тику через снимок даёт то же состояние, что и исходная партия, в том числе на тиках снимков"""
+    path = str(tmp_path / "game.snkr")
+    _, views = _play(path, level, seed=3)
+    replay = Replay.load(path)
+    ticks = [0, INTERVAL, INTERVAL + 1, replay.ticks] + random.Random(3).sample(range(replay.ticks + 1), 20)
+    for tick in ticks:
+        assert _view(replay.seek(tick).state) == views[tick]
+    # Движок, уже стоящий перед нужным тиком, продвигается дальше без снимка
+    engine = replay.seek(INTERVAL // 2)
+    assert replay.seek(INTERVAL - 1, engine) is engine
+    assert _view(engine.state) == views[INTERVAL - 1]
\ No newline at end of file
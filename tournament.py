@@ -0,0 +1,155 @@
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from settings import Settings
+from engine import Engine, WIN, LOSE
+from autopilot import Autopilot
+
+class GreedyPolicy:
+    """Ход в соседнюю свободную клетку, ближайшую к еде; тупики не учитываются"""
+    def __init__(self, grid, seed=None):
+        self.cols = grid.cols
+        self.rows = grid.rows
+    
+    def control(self, state):
+        moves = _free_moves(state)
+        foods = [food.position for food in state.grid.foods.values()]
+        if not moves or not foods:
+            return None
+        direction = min(moves, key=lambda move: min(abs(move[1][0] - fx) + abs(move[1][1] - fy)
+                                                    for fx, fy in foods))[0]
+        state.snake.change_direction(direction)
+        return direction
+
+class RandomPolicy:
+    """Случайный ход в соседнюю свободную клетку; зерно партии делает выбор воспроизводимым"""
+    def __init__(self, grid, seed=None):
+        self.rng = random.Random(seed)
+    
+    def control(self, state):
+        moves = _free_moves(state)
+        if not moves:
+            return None
+        direction = self.rng.choice(moves)[0]
+        state.snake.change_direction(direction)
+        return direction
+
+def _free_moves(state):
+    """Возвращает [(направление, клетка)] ходов, не ведущих сразу к поражению"""
+    snake = state.snake
+    x, y = snake.body[0]
+    size = snake.block_size
+    tail = snake.body[-1]
+    moves = []
+    for direction, (dx, dy) in (("UP", (0, -size)), ("DOWN", (0, size)),
+                                ("LEFT", (-size, 0)), ("RIGHT", (size, 0))):
+        if direction == snake.OPPOSITE_DIRECTIONS[snake.last_direction]:
+            continue
+        pos = (x + dx, y + dy)
+        if 0 <= pos[0] < snake.dis_width and 0 <= pos[1] < snake.dis_height:
+            if not snake.is_occupied(pos) or pos == tail:
+                moves.append((direction, pos))
+    return moves
+
+# Политики управления: имя -> конструктор (сетка поля, seed) объекта с методом control(state)
+POLICIES = {
+    "autopilot": lambda grid, seed: Autopilot(grid.cols, grid.rows, grid.walls),
+    "greedy": GreedyPolicy,
+    "random": RandomPolicy,
+}
+
+def play_chunk(policy_name, level, seeds, max_ticks):
+    """Играет партии с указанными зёрнами в процессе-исполнителе; возвращает (результаты, pid, тиков, секунд)"""
+    started = time.perf_counter()
+    engine = Engine(level)
+    grid = engine.state.grid
+    results = []
+    total_ticks = 0
+    for seed in seeds:
+        game_started = time.perf_counter()
+        state = engine.reset(level, seed)
+        # Своя политика на партию: случайные политики получают зерно партии
+        policy = POLICIES[policy_name](grid, seed)
+        event = None
+        while event not in (WIN, LOSE) and state.tick < max_ticks:
+            policy.control(state)
+            state, event = engine.step()
+        total_ticks += state.tick
+        results.append({
+            "policy": policy_name,
+            "level": level,
+            "seed": seed,
+            "result": event if event in (WIN, LOSE) else "timeout",
+            "score": state.score,
+            "ticks": state.tick,
+            "seconds": round(time.perf_counter() - game_started, 6),
+        })
+    return results, os.getpid(), total_ticks, time.perf_counter() - started
+
+def run_tournament(policies, levels, games, seed=0, workers=None, chunk_size=50, max_ticks=100000):
+    """Запускает партии всех политик на всех уровнях параллельно; выдаёт (результаты пачки, pid, тиков, секунд)
+    по мере готовности пачек. Зёрна партий - seed, seed + 1, ..., одинаковые для всех политик и уровней.
+    """
+    seeds = list(range(seed, seed + games))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(play_chunk, policy, level, seeds[start:start + chunk_size], max_ticks)
+            for policy in policies
+            for level in levels
+            for start in range(0, games, chunk_size)
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+
+def summarize(results, workers):
+    """Возвращает строки итогового отчёта: по политикам и уровням, затем по процессам"""
+    groups = {}
+    for result in results:
+        groups.setdefault((result["policy"], result["level"]), []).append(result)
+    lines = [f"{'политика':<10} {'уровень':>7} {'партий':>7} {'побед':>7} {'счёт':>7} {'тиков':>8}"]
+    for (policy, level), group in sorted(groups.items()):
+        wins = sum(result["result"] == WIN for result in group)
+        score = sum(result["score"] for result in group) / len(group)
+        ticks = sum(result["ticks"] for result in group) / len(group)
+        lines.append(f"{policy:<10} {level:>7} {len(group):>7} {wins / len(group):>7.1%} {score:>7.2f} {ticks:>8.0f}")
+    lines.append("Процессы:")
+    for pid, (ticks, seconds) in sorted(workers.items()):
+        lines.append(f"  {pid}: {ticks} тиков за {seconds:.1f} с, {ticks / seconds:,.0f} тиков/с")
+    return lines
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Турнир политик управления змейкой без графики")
+    parser.add_argument("--policies", nargs="+", choices=sorted(POLICIES), default=sorted(POLICIES),
+                        help="политики управления")
+    parser.add_argument("--levels", type=int, nargs="+", default=list(Settings.LEVELS), help="уровни")
+    parser.add_argument("--games", type=int, default=1000, help="партий на политику и уровень")
+    parser.add_argument("--seed", type=int, default=0, help="зерно первой партии")
+    parser.add_argument("--workers", type=int, default=None, help="число процессов")
+    parser.add_argument("--chunk-size", type=int, default=50, help="партий в одной задаче процесса")
+    parser.add_argument("--max-ticks", type=int, default=100000, help="предел длины партии")
+    parser.add_argument("-o", "--output", default="-", help="JSONL с результатами партий ('-' - stdout)")
+    args = parser.parse_args()
+    
+    out = sys.stdout if args.output == "-" else open(args.output, "w")
+    results = []
+    workers = {}
+    try:
+        for chunk, pid, ticks, seconds in run_tournament(args.policies, args.levels, args.games, args.seed,
+                                                          args.workers, args.chunk_size, args.max_ticks):
+            # Результаты пишутся по мере готовности, а не в конце турнира
+            for result in chunk:
+                out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            out.flush()
+            results.extend(chunk)
+            worker_ticks, worker_seconds = workers.get(pid, (0, 0.0))
+            workers[pid] = (worker_ticks + ticks, worker_seconds + seconds)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    
+    # Отчёт идёт в stderr, чтобы не смешиваться с JSONL в stdout
+    print("\n".join(summarize(results, workers)), file=sys.stderr)
\ No newline at end of file